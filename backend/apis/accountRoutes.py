@@ -9,7 +9,7 @@ app = Flask(__name__)
 swagger = Swagger(app)
 
 account_bp = Blueprint('account_bp', __name__)
-db = blibs.get_db()
+db = blibs.lazy_db()
 
 def get_time():
     # Define the get_time function here if it's used
@@ -1,13 +1,163 @@
+import re
+from datetime import datetime, timezone
 from flask import Flask, Blueprint, request, jsonify
 from bson.objectid import ObjectId
 from flasgger import Swagger, swag_from
-from config.DBs import get_db
+from config.DBs import lazy_db
+from config.pagination import fields_projection, find_page
 
 app = Flask(__name__)
 swagger = Swagger(app)
 
 best_matches_bp = Blueprint('best_matches_bp', __name__)
-db = get_db()
+db = lazy_db()
+
+# Fields of the listings unless asked for with ?fields=: the match itself and the few issue
+# fields the review screens show, instead of the full copy of the issue
+MATCH_LIST_FIELDS = (
+    'jira_id', 'best_matches', 'ticket_summary', 'description_summary', 'comments_summary',
+    'issue.ID', 'issue.Title', 'issue.Status', 'issue.Project', 'issue.Created'
+)
+
+MATCH_LIST_PARAMETERS = [
+    {
+        'name': 'cursor',
+        'in': 'query',
+        'type': 'string',
+        'description': 'next_cursor of the previous page'
+    },
+    {
+        'name': 'limit',
+        'in': 'query',
+        'type': 'integer',
+        'default': 50,
+        'description': 'Matches per page (at most 500)'
+    },
+    {
+        'name': 'fields',
+        'in': 'query',
+        'type': 'string',
+        'description': 'Comma separated fields to return instead of the default view, e.g. issue,best_matches'
+    },
+    {
+        'name': 'path',
+        'in': 'query',
+        'type': 'string',
+        'description': 'Best match path or one of its ancestors, e.g. Root -> Network'
+    },
+    {
+        'name': 'similar_to',
+        'in': 'query',
+        'type': 'string',
+        'description': 'Tree path; keeps issues with any of their best matches on that path, below it or on one of its ancestors'
+    },
+    {
+        'name': 'min_score',
+        'in': 'query',
+        'type': 'number',
+        'description': 'Minimum similarity score of the best match'
+    },
+    {'name': 'project', 'in': 'query', 'type': 'string'},
+    {'name': 'status', 'in': 'query', 'type': 'string'},
+    {
+        'name': 'created_from',
+        'in': 'query',
+        'type': 'string',
+        'description': 'Earliest issue creation date, e.g. 2024-01-31'
+    },
+    {
+        'name': 'created_to',
+        'in': 'query',
+        'type': 'string',
+        'description': 'Latest issue creation date, e.g. 2024-02-29'
+    }
+]
+
+
+def created_condition(operator, date):
+    """Compare issue.Created with an ISO date, whichever way the issue stores it.
+
+    The Jira sync stores ISO 8601 strings, which compare as strings, and
+    /jira/bulk stores epoch milliseconds. Dates without a timezone are UTC.
+    Raises ValueError for a date that is not ISO 8601.
+    """
+    parsed = datetime.fromisoformat(date)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return {'$or': [
+        {'issue.Created': {operator: date}},
+        {'issue.Created': {operator: int(parsed.timestamp() * 1000)}},
+    ]}
+
+
+def parse_flag(value, name):
+    if value.lower() in ('true', '1'):
+        return True
+    if value.lower() in ('false', '0'):
+        return False
+    raise ValueError(f'invalid {name} {value}, expected true or false')
+
+
+def match_list_query(args, no_match=None):
+    """Mongo filter for the best match listings from their query parameters (cursor excluded).
+
+    no_match overrides the no_match parameter. Raises ValueError for an
+    invalid no_match, min_score or creation date.
+    """
+    conditions = []
+    if no_match is None and args.get('no_match'):
+        no_match = parse_flag(args['no_match'], 'no_match')
+    if no_match is not None:
+        # A null match on the path also covers best_matches being null, empty or absent
+        conditions.append({'best_matches.0.path': None if no_match else {'$ne': None}})
+    if args.get('path'):
+        # Anchored, so the best_matches.0.path index bounds the scan to the subtree
+        conditions.append({'best_matches.0.path': {'$regex': f"^{re.escape(args['path'])}( -> |$)"}})
+    if args.get('similar_to'):
+        path = args['similar_to']
+        parts = path.split(' -> ')
+        lineage = [' -> '.join(parts[:end]) for end in range(1, len(parts) + 1)]
+        conditions.append({'$or': [
+            {'best_matches.path': {'$in': lineage}},
+            {'best_matches.path': {'$regex': f"^{re.escape(path)} -> "}},
+        ]})
+    if args.get('min_score'):
+        try:
+            min_score = float(args['min_score'])
+        except ValueError:
+            raise ValueError(f"invalid min_score {args['min_score']}")
+        conditions.append({'best_matches.0.similarity_score': {'$gte': min_score}})
+    if args.get('project'):
+        conditions.append({'issue.Project': args['project']})
+    if args.get('status'):
+        conditions.append({'issue.Status': args['status']})
+    if args.get('created_from'):
+        conditions.append(created_condition('$gte', args['created_from']))
+    if args.get('created_to'):
+        conditions.append(created_condition('$lte', args['created_to']))
+    return {'$and': conditions} if conditions else {}
+
+
+def list_matches(no_match=None):
+    try:
+        matches, next_cursor = find_page(
+            db.matched_issues,
+            match_list_query(request.args, no_match),
+            fields_projection(request.args.get('fields'), {field: 1 for field in MATCH_LIST_FIELDS}),
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', type=int)
+        )
+        return jsonify({
+            'data': matches,
+            'next_cursor': next_cursor
+        })
+    except ValueError as e:
+        return jsonify({
+            'notif': {
+                'type': "warning",
+                'msg': f"Unable to get best matches: {str(e)}",
+            }
+        }), 400
 
 @best_matches_bp.route('/', methods=['POST'])
 @swag_from({
@@ -71,32 +221,42 @@ def add_best_match():
 @best_matches_bp.route('/', methods=['GET'])
 @swag_from({
     'tags': ['Best Matches'],
-    'description': 'Get all best matches',
+    'description': 'List best matches one page at a time, in _id order. Pass the next_cursor of a page as cursor to get '
+                   'the following one; next_cursor is null on the last page. Only a few issue fields are returned '
+                   'unless requested through fields; GET /<id> returns the whole match.',
+    'parameters': MATCH_LIST_PARAMETERS + [
+        {
+            'name': 'no_match',
+            'in': 'query',
+            'type': 'boolean',
+            'description': 'true for issues without a best match only, false for matched issues only'
+        }
+    ],
     'responses': {
         '200': {
-            'description': 'A list of best matches',
+            'description': 'A page of best matches',
             'examples': {
                 'application/json': {
                     'data': [
                         {
-                            'issue': 'Issue description here...',
-                            'best_match': 'Root > Node > Subnode',
-                            'similarity_score': 0.95
+                            '_id': '60d0fe4f5311236168a109cb',
+                            'jira_id': '60d0fe4f5311236168a109ca',
+                            'issue': {'ID': 'JIRA-123', 'Title': 'Issue title', 'Status': 'Open', 'Project': 'DevOps'},
+                            'best_matches': [{'path': 'Root -> Node -> Subnode', 'similarity_score': 0.95}],
+                            'ticket_summary': 'Ticket summary'
                         }
-                    ]
+                    ],
+                    'next_cursor': '60d0fe4f5311236168a109cb'
                 }
             }
+        },
+        '400': {
+            'description': 'Invalid cursor, fields, no_match, min_score or creation date'
         }
     }
 })
 def get_best_matches():
-    matches = []
-    for match in db.matched_issues.find():
-        match['_id'] = str(match['_id'])
-        matches.append(match)
-    return jsonify({
-        'data': matches
-    })
+    return list_matches()
 
 @best_matches_bp.route('/<id>', methods=['GET'])
 @swag_from({
@@ -276,31 +436,31 @@ def delete_best_match(id):
 @best_matches_bp.route('/no_match', methods=['GET'])
 @swag_from({
     'tags': ['Best Matches'],
-    'description': 'Get all issues with no match',
+    'description': 'List the issues with no match one page at a time, like GET / with no_match=true',
+    'parameters': MATCH_LIST_PARAMETERS,
     'responses': {
         '200': {
-            'description': 'A list of issues with no match',
+            'description': 'A page of issues with no match',
             'examples': {
                 'application/json': {
                     'data': [
                         {
-                            'issue': 'Issue description here...',
-                            'reason': 'No paths with sufficient similarity'
+                            '_id': '60d0fe4f5311236168a109cb',
+                            'jira_id': '60d0fe4f5311236168a109ca',
+                            'best_matches': None
                         }
-                    ]
+                    ],
+                    'next_cursor': None
                 }
             }
+        },
+        '400': {
+            'description': 'Invalid cursor, fields, min_score or creation date'
         }
     }
 })
 def get_no_match_issues():
-    no_match_issues = []
-    for issue in db.matched_issues.find({'best_matches': None}):
-        issue['_id'] = str(issue['_id'])
-        no_match_issues.append(issue)
-    return jsonify({
-        'data': no_match_issues
-    })
+    return list_matches(no_match=True)
 
 @best_matches_bp.route('/update_no_match_issue', methods=['POST'])
 @swag_from({
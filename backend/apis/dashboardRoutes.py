@@ -1,7 +1,7 @@
 from config.blibs import *
 
 dashboard_bp = Blueprint('dashboard_bp', __name__)
-db = get_db()
+db = lazy_db()
 
 @dashboard_bp.route("/", methods=["POST"])
 def parseEmails():
@@ -1,7 +1,7 @@
 from config.blibs import *
 
 dataset_bp = Blueprint('dataset_bp', __name__)
-db = get_db()
+db = lazy_db()
 
 @dataset_bp.route("/", methods=["POST"])
 def uploadFile():
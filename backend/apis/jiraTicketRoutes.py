@@ -1,16 +1,27 @@
 from flask import Blueprint, request, jsonify
 from bson.objectid import ObjectId
+from pymongo.errors import BulkWriteError
 from flasgger import swag_from
 from config.utils import get_time
 from models.jiraTicketModel import JiraTicket
-from config.blibs import get_db
-from transformers import pipeline
+from config.blibs import get_db, lazy_db
+from config.summaryCache import get_summary_cache
+from config.modelRegistry import INGEST_QA_MODEL, NER_MODEL, run_ner, run_qa
+from config.embeddingStore import EmbeddingStore
+from config.embeddings import EMBEDDING_MODEL_ID, get_bert_embeddings
+from config.preprocessing import missing_preprocessing_resources, preprocess_text
+from config.ticketIndex import get_ticket_index, index_tickets
+from config.dedup import flag_duplicates, remember_fingerprints
+from config.pagination import fields_projection, find_page
 
 jira_bp = Blueprint('jira_bp', __name__)
 
-qa_pipeline = pipeline("question-answering")
-ner_pipeline = pipeline("ner", model="dslim/bert-large-NER")
-db = get_db()
+db = lazy_db()
+
+# Question asked about each description to summarize it on ingest
+INGEST_QUESTION = "What are we talking about?"
+# NER score above which a person name is redacted from an ingest summary
+REDACT_THRESHOLD = 0.7
 
 # Add a single JIRA ticket
 @jira_bp.route('/', methods=['POST'])
@@ -159,8 +170,11 @@ def add_ticket():
                 'application/json': {
                     'notif': {
                         'type': 'success',
-                        'msg': 'Tickets Added Successfully'
-                    }
+                        'msg': 'Tickets Added Successfully (1 flagged as likely duplicates)'
+                    },
+                    'duplicates': [
+                        {'key': 'JIRA-124', 'duplicate_of': 'JIRA-123'}
+                    ]
                 }
             }
         },
@@ -180,6 +194,7 @@ def add_ticket():
 def add_tickets():
     try:
         db = get_db()  # Ensure you have your db connection here
+        summary_cache = get_summary_cache()
         tickets_data = request.json
         keys = [ticket.get('key') for ticket in tickets_data]
         existing_tickets = db.jira_tickets.find({'key': {'$in': keys}})
@@ -193,29 +208,61 @@ def add_tickets():
                 }
             })
 
+        # Summarize every description of the batch in one QA pass, then redact names in one NER pass;
+        # only the descriptions and summaries missing from the cache go through the pipelines
+        described = [ticket_data for ticket_data in tickets_data if ticket_data.get('Description', '')]
+        summaries = summary_cache.lookup(
+            INGEST_QA_MODEL,
+            [(INGEST_QUESTION, ticket_data['Description']) for ticket_data in described],
+            lambda items: run_qa(INGEST_QA_MODEL, items),
+            task='answer'
+        ) if described else []
+        summaries = summary_cache.lookup(
+            NER_MODEL,
+            [(None, summary) for summary in summaries],
+            lambda items: [
+                remove_person_names(text, entities, REDACT_THRESHOLD)
+                for (_, text), entities in zip(items, run_ner(NER_MODEL, [text for _, text in items]))
+            ],
+            task='redact',
+            params={'threshold': REDACT_THRESHOLD}
+        ) if summaries else []
+        for ticket_data, summary in zip(described, summaries):
+            ticket_data['SumDesc'] = summary
+
         tickets = []
         for ticket_data in tickets_data:
-            description = ticket_data.get('Description', '')
-            if description:
-                # Generate summary of the description using the QA pipeline
-                answer = qa_pipeline(question="What are we talking about?", context=description)
-                summary = answer['answer']
-
-                # Remove personal names from the summary
-                summary = remove_person_names(summary, ner_pipeline)
-                ticket_data['SumDesc'] = summary
-            else:
+            if not ticket_data.get('Description', ''):
                 ticket_data['SumDesc'] = "No description available"
             tickets.append(JiraTicket.from_dict(ticket_data))
 
-        results = db.jira_tickets.insert_many([ticket.to_dict() for ticket in tickets])
+        ticket_docs = [ticket.to_dict() for ticket in tickets]
+        # Flag tickets repeating an existing (or earlier in this batch) description
+        duplicates_count = flag_duplicates(db, ticket_docs)
+        try:
+            results = db.jira_tickets.insert_many(ticket_docs)
+        except BulkWriteError as e:
+            # The insert is ordered: the tickets before the failing one were written
+            remember_fingerprints(db, ticket_docs[:e.details.get('nInserted', 0)])
+            index_tickets(db, ticket_docs[:e.details.get('nInserted', 0)])
+            raise
+        remember_fingerprints(db, ticket_docs)
+        # Make the new tickets findable through /jira/<id>/similar without waiting for a classification run
+        index_tickets(db, ticket_docs)
 
         if results.inserted_ids:
+            msg = "Tickets Added Successfully"
+            if duplicates_count:
+                msg += f" ({duplicates_count} flagged as likely duplicates)"
             return jsonify({
                 'notif': {
                     'type': "success",
-                    'msg': "Tickets Added Successfully",
-                }
+                    'msg': msg,
+                },
+                'duplicates': [
+                    {'key': doc['Key'], 'duplicate_of': doc['DuplicateOf']}
+                    for doc in ticket_docs if doc['DuplicateOf']
+                ]
             })
 
     except KeyError as e:
@@ -241,10 +288,9 @@ def add_tickets():
             }
         })
 
-def remove_person_names(text, ner_pipeline, threshold=0.7):
-    # Use the NER pipeline to detect named entities and remove person names
-    results = ner_pipeline(text)
-    for entity in results:
+def remove_person_names(text, entities, threshold=REDACT_THRESHOLD):
+    # Replace the person names among the NER entities found in text
+    for entity in entities:
         if entity['score'] > threshold and entity['entity'].startswith("B-PER"):
             text = text.replace(entity['word'], "[REDACTED]")
     return text
@@ -328,6 +374,119 @@ def get_ticket(id):
             }
         })
 
+@jira_bp.route('/<id>/similar', methods=['GET'])
+@swag_from({
+    'summary': 'Find tickets similar to a JIRA ticket',
+    'description': 'Returns the k tickets whose description embeddings are closest to this ticket, searched in the in-process ticket index. A ticket that was never embedded is embedded on the fly.',
+    'parameters': [
+        {
+            'name': 'id',
+            'in': 'path',
+            'required': True,
+            'type': 'string',
+            'example': '60d5f2b5c2b8f3b4b0e8b5a1'
+        },
+        {
+            'name': 'k',
+            'in': 'query',
+            'required': False,
+            'type': 'integer',
+            'default': 10,
+            'description': 'Number of similar tickets to return (at most 100)'
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Similar tickets, most similar first',
+            'examples': {
+                'application/json': {
+                    'data': [
+                        {
+                            'jira_id': '60d5f2b5c2b8f3b4b0e8b5a2',
+                            'ID': 'JIRA-456',
+                            'Title': 'Similar issue title',
+                            'Status': 'Closed',
+                            'Project': 'DevOps',
+                            'score': 0.9312
+                        }
+                    ]
+                }
+            }
+        },
+        404: {
+            'description': 'Ticket not found',
+            'examples': {
+                'application/json': {
+                    'notif': {
+                        'type': 'warning',
+                        'msg': 'Unable to find similar tickets: id 60d5f2b5c2b8f3b4b0e8b5a1 not found'
+                    }
+                }
+            }
+        }
+    }
+})
+def get_similar_tickets(id):
+    try:
+        k = min(max(request.args.get('k', 10, type=int), 1), 100)
+        ticket = db.jira_tickets.find_one({'_id': ObjectId(id)}, {'Description': 1})
+        if not ticket:
+            return jsonify({
+                'notif': {
+                    'type': "warning",
+                    'msg': f"Unable to find similar tickets: id <b data-time='{get_time()}'>{id}</b> not found",
+                }
+            }), 404
+
+        ticket_index = get_ticket_index(db)
+        vector = ticket_index.vector_of(id)
+        if vector is None:
+            text = preprocess_text(ticket.get('Description'))
+            if not text.strip():
+                return jsonify({
+                    'data': [],
+                    'notif': {
+                        'type': "warning",
+                        'msg': f"Ticket <b data-time='{get_time()}'>{id}</b> has no description to compare",
+                    }
+                })
+            keys, vectors = EmbeddingStore(db, EMBEDDING_MODEL_ID).embed([text], get_bert_embeddings)
+            # A key computed without the NLTK data would differ from the one classification stores later
+            if not missing_preprocessing_resources():
+                db.jira_tickets.update_one({'_id': ticket['_id']}, {'$set': {'EmbeddingKey': keys[0]}})
+                ticket_index.add([id], keys, vectors)
+            vector = vectors[0]
+
+        # Ask for a few extra neighbors in case some were deleted since they were indexed
+        neighbors = ticket_index.search(vector, k=k + 5, exclude={id})
+        found = {
+            str(doc['_id']): doc
+            for doc in db.jira_tickets.find(
+                {'_id': {'$in': [ObjectId(ticket_id) for ticket_id, _ in neighbors]}},
+                {'ID': 1, 'Title': 1, 'Status': 1, 'Project': 1}
+            )
+        }
+        return jsonify({
+            'data': [
+                {
+                    'jira_id': ticket_id,
+                    'ID': found[ticket_id].get('ID'),
+                    'Title': found[ticket_id].get('Title'),
+                    'Status': found[ticket_id].get('Status'),
+                    'Project': found[ticket_id].get('Project'),
+                    'score': round(score, 4),
+                }
+                for ticket_id, score in neighbors if ticket_id in found
+            ][:k]
+        })
+    except Exception as e:
+        return jsonify({
+            'notif': {
+                'type': "danger",
+                'msg': f"Error finding similar tickets: <b data-time='{get_time()}'></b>{str(e)}",
+            }
+        }), 500
+
 @jira_bp.route('/<id>', methods=['PUT'])
 @swag_from({
     'summary': 'Update a JIRA ticket by ID',
@@ -507,36 +666,89 @@ def delete_ticket(id):
         })
 
 
+# Fields left out of GET /jira/ unless asked for with ?fields=
+TICKET_LIST_EXCLUDED_FIELDS = ('Embedding', 'Comments')
+# Query parameters of GET /jira/ matched exactly against the field of the same name
+TICKET_LIST_FILTERS = ('Project', 'Status', 'Type', 'Resolution')
+
+
+def ticket_list_query(args):
+    """Mongo filter for GET /jira/ from its query parameters (cursor excluded)."""
+    query = {field: args[field] for field in TICKET_LIST_FILTERS if args.get(field)}
+    activated = args.get('Activated')
+    if activated:
+        # Same rule as toggle_activation and the ticket table: only the activated flag counts, unset means deactivated
+        query['activated'] = True if activated.lower() in ('true', '1') else {'$ne': True}
+    return query
+
+
 @jira_bp.route('/', methods=['GET'])
 @swag_from({
-    'summary': 'Get all JIRA tickets',
-    'description': 'This endpoint retrieves all JIRA tickets.',
+    'summary': 'List JIRA tickets',
+    'description': 'Returns one page of JIRA tickets in _id order. Pass the next_cursor of a page as cursor to get the '
+                   'following one; next_cursor is null on the last page. Embeddings and comments are left out unless '
+                   'requested through fields.',
+    'parameters': [
+        {
+            'name': 'cursor',
+            'in': 'query',
+            'required': False,
+            'type': 'string',
+            'description': 'next_cursor of the previous page'
+        },
+        {
+            'name': 'limit',
+            'in': 'query',
+            'required': False,
+            'type': 'integer',
+            'default': 50,
+            'description': 'Tickets per page (at most 500)'
+        },
+        {
+            'name': 'fields',
+            'in': 'query',
+            'required': False,
+            'type': 'string',
+            'description': 'Comma separated fields to return instead of the default view, e.g. Title,Status,Project'
+        },
+        {'name': 'Project', 'in': 'query', 'required': False, 'type': 'string'},
+        {'name': 'Status', 'in': 'query', 'required': False, 'type': 'string'},
+        {'name': 'Type', 'in': 'query', 'required': False, 'type': 'string'},
+        {'name': 'Resolution', 'in': 'query', 'required': False, 'type': 'string'},
+        {'name': 'Activated', 'in': 'query', 'required': False, 'type': 'boolean'}
+    ],
     'responses': {
         200: {
-            'description': 'A list of JIRA tickets',
+            'description': 'A page of JIRA tickets',
             'examples': {
                 'application/json': {
                     'data': [
                         {
                             '_id': '60d5f2b5c2b8f3b4b0e8b5a1',
-                            'key': 'JIRA-123',
-                            'title': 'Issue title',
-                            'created': 1708041600000,
-                            'updated': 1708300800000,
-                            'status': 'Open',
-                            'project': 'DevOps',
-                            'component': 'DevOps DIGITAL APP',
-                            'ticket_type': 'Problem Report',
-                            'resolution': 'Unresolved',
-                            'description': 'Issue description',
-                            'comments': 'Comments',
-                            'sum_desc': 'Summary Description',
-                            'sum_comm': 'Summary Comments',
-                            'ticket_sum': 'Ticket Summary',
-                            'embedding': [0.1, 0.2, 0.3, 0.4],
+                            'ID': 'JIRA-123',
+                            'Title': 'Issue title',
+                            'Status': 'Open',
+                            'Project': 'DevOps',
+                            'Component': 'DevOps DIGITAL APP',
+                            'Type': 'Problem Report',
+                            'Resolution': 'Unresolved',
+                            'Description': 'Issue description',
+                            'TicketSum': 'Ticket Summary',
                             'activated': True
                         }
-                    ]
+                    ],
+                    'next_cursor': '60d5f2b5c2b8f3b4b0e8b5a1'
+                }
+            }
+        },
+        400: {
+            'description': 'Invalid cursor',
+            'examples': {
+                'application/json': {
+                    'notif': {
+                        'type': 'warning',
+                        'msg': 'Unable to get tickets: invalid cursor abc'
+                    }
                 }
             }
         }
@@ -544,13 +756,24 @@ def delete_ticket(id):
 })
 def get_tickets():
     try:
-        tickets = []
-        for ticket in db.jira_tickets.find():
-            ticket['_id'] = str(ticket['_id'])
-            tickets.append(ticket)
+        tickets, next_cursor = find_page(
+            db.jira_tickets,
+            ticket_list_query(request.args),
+            fields_projection(request.args.get('fields'), {field: 0 for field in TICKET_LIST_EXCLUDED_FIELDS}),
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', type=int)
+        )
         return jsonify({
-            'data': tickets
+            'data': tickets,
+            'next_cursor': next_cursor
         })
+    except ValueError as e:
+        return jsonify({
+            'notif': {
+                'type': "warning",
+                'msg': f"Unable to get tickets: <b data-time='{get_time()}'></b>{str(e)}",
+            }
+        }), 400
     except Exception as e:
         return jsonify({
             'notif': {
@@ -560,6 +783,42 @@ def get_tickets():
         })
 
 
+@jira_bp.route('/filters', methods=['GET'])
+@swag_from({
+    'summary': 'Values of the JIRA ticket list filters',
+    'description': 'Distinct Project, Status, Type and Resolution values across all tickets, to fill the filters of GET /jira/.',
+    'responses': {
+        200: {
+            'description': 'Filter values',
+            'examples': {
+                'application/json': {
+                    'data': {
+                        'Project': ['DevOps'],
+                        'Status': ['Closed', 'Open'],
+                        'Type': ['Problem Report'],
+                        'Resolution': ['Fixed', 'Unresolved']
+                    }
+                }
+            }
+        }
+    }
+})
+def get_ticket_filters():
+    try:
+        return jsonify({
+            'data': {
+                field: sorted(value for value in db.jira_tickets.distinct(field) if isinstance(value, str) and value)
+                for field in TICKET_LIST_FILTERS
+            }
+        })
+    except Exception as e:
+        return jsonify({
+            'notif': {
+                'type': "danger",
+                'msg': f"Error retrieving ticket filters: {str(e)}"
+            }
+        })
+
 
 @jira_bp.route('/<ticket_id>/toggle-activation', methods=['PATCH'])
 @swag_from({
@@ -7,7 +7,7 @@ from config.blibs import *
 
 login_bp = Blueprint('login_bp', __name__)
 register_bp = Blueprint('register_bp', __name__)
-db = get_db()
+db = lazy_db()
 
 SECRET_KEY = 'Makiz-Code'
 
@@ -1,6 +1,6 @@
 import json
 from flask import Flask, request, jsonify, Blueprint
-from transformers import pipeline
+from config.modelRegistry import ANSWER_QA_MODEL, get_pipeline
 from flasgger import Swagger, swag_from
 from config.blibs import get_db
 
@@ -11,9 +11,6 @@ qa_bp = Blueprint('qa_bp', __name__)
 # Initialize Swagger
 swagger = Swagger(app)
 
-# Load the pre-trained question-answering pipeline
-qa_pipeline = pipeline("question-answering", model="bert-large-uncased-whole-word-masking-finetuned-squad")
-
 @qa_bp.route('/answer_question', methods=['POST'])
 @swag_from({
     'tags': ['Question Answering'],
@@ -123,7 +120,8 @@ def answer_question():
             if not context:
                 return jsonify({'error': 'No comments or description available for this ticket'}), 404
 
-        # Use the question-answering pipeline to get the answer
+        # Use the question-answering pipeline to get the answer (loaded on first use)
+        qa_pipeline = get_pipeline("question-answering", ANSWER_QA_MODEL)
         answer = qa_pipeline(question=question, context=context)
 
         return jsonify({
@@ -0,0 +1,129 @@
+from flask import Blueprint, jsonify
+from flasgger import swag_from
+from config.DBs import get_db, get_pool_stats
+from config.indexes import index_report
+from config.modelRegistry import model_stats, readiness
+from config.preprocessing import missing_preprocessing_resources
+
+system_bp = Blueprint('system_bp', __name__)
+
+@system_bp.route('/models', methods=['GET'])
+@swag_from({
+    'tags': ['System'],
+    'summary': 'Loaded models',
+    'description': 'Lists the models loaded in this process through the model registry, with their load time and parameter memory.',
+    'responses': {
+        200: {
+            'description': 'Loaded models',
+            'examples': {
+                'application/json': {
+                    'data': [
+                        {
+                            'task': 'ner',
+                            'model': 'dslim/bert-large-NER',
+                            'load_seconds': 4.2,
+                            'parameter_bytes': 1330000000,
+                            'parameter_mb': 1268.4
+                        }
+                    ]
+                }
+            }
+        }
+    }
+})
+def get_models():
+    return jsonify({
+        'data': model_stats()
+    })
+
+@system_bp.route('/ready', methods=['GET'])
+@swag_from({
+    'tags': ['System'],
+    'summary': 'Readiness',
+    'description': 'Reports whether the background warm-up has loaded every configured model and the NLTK data preprocessing needs is available. Routes that use neither are served before this turns ready.',
+    'responses': {
+        200: {
+            'description': 'All models are loaded',
+            'examples': {
+                'application/json': {
+                    'ready': True,
+                    'status': 'ready',
+                    'loaded': ['feature-extraction:bert-base-uncased', 'ner:dslim/bert-large-NER'],
+                    'pending': [],
+                    'failed': {},
+                    'nltk_missing': []
+                }
+            }
+        },
+        503: {
+            'description': 'Models are still loading or failed to load, or NLTK data is still missing'
+        }
+    }
+})
+def get_ready():
+    state = readiness()
+    state['nltk_missing'] = missing_preprocessing_resources()
+    state['ready'] = state['ready'] and not state['nltk_missing']
+    return jsonify(state), 200 if state['ready'] else 503
+
+@system_bp.route('/mongo', methods=['GET'])
+@swag_from({
+    'tags': ['System'],
+    'summary': 'MongoDB connection pool',
+    'description': 'Connection pool settings and event counters of the MongoClient shared by this process.',
+    'responses': {
+        200: {
+            'description': 'Pool statistics',
+            'examples': {
+                'application/json': {
+                    'data': {
+                        'pid': 4242,
+                        'client_created': True,
+                        'max_pool_size': 50,
+                        'min_pool_size': 0,
+                        'compressors': None,
+                        'connections_created': 4,
+                        'connections_closed': 0,
+                        'checked_out': 18230,
+                        'checked_in': 18229,
+                        'check_out_failed': 0,
+                        'pools_cleared': 0,
+                        'open_connections': 4,
+                        'in_use': 1
+                    }
+                }
+            }
+        }
+    }
+})
+def get_mongo_pool():
+    return jsonify({
+        'data': get_pool_stats()
+    })
+
+@system_bp.route('/indexes', methods=['GET'])
+@swag_from({
+    'tags': ['System'],
+    'summary': 'MongoDB index report',
+    'description': 'Compares the indexes of every collection with the registry in config/indexes.py: registered indexes that are missing, indexes that are not registered, and indexes with no recorded use since the server started. Collections with nothing to report are omitted.',
+    'responses': {
+        200: {
+            'description': 'Index report',
+            'examples': {
+                'application/json': {
+                    'data': {
+                        'jira_tickets': {
+                            'missing': ['ID_1'],
+                            'unregistered': [],
+                            'unused': ['Key_1']
+                        }
+                    }
+                }
+            }
+        }
+    }
+})
+def get_index_report():
+    return jsonify({
+        'data': index_report(get_db())
+    })
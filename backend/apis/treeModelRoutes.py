@@ -1,16 +1,13 @@
 import re
 from flask import Blueprint, request, jsonify
-from config.blibs import get_db
+from config.blibs import lazy_db
 from flasgger import swag_from
-from transformers import BertTokenizer, BertModel
-import torch
+from config.embeddings import get_bert_embeddings
+from config.treeIndex import build_leaf_matrix, load_leaf_matrix, new_tree_version, save_leaf_matrix
+import numpy as np
 
 tree_model_bp = Blueprint('tree_model_bp', __name__)
-db = get_db()
-
-# Load pre-trained BERT model and tokenizer once
-tokenizer = BertTokenizer.from_pretrained('bert-base-uncased')
-model = BertModel.from_pretrained('bert-base-uncased')
+db = lazy_db()
 
 class TreeNode:
     def __init__(self, id, name, children=None, embedding=None):
@@ -32,18 +29,106 @@ class TreeNode:
         return TreeNode(
             id=data['id'],
             name=data['name'],
-            embedding=torch.tensor(data['embedding']) if data.get('embedding') is not None else None,
+            embedding=np.asarray(data['embedding'], dtype=np.float32) if data.get('embedding') is not None else None,
             children=data.get('children', [])
         )
 
-    def compute_embedding(self):
-        inputs = tokenizer(self.name, return_tensors='pt')
-        with torch.no_grad():
-            outputs = model(**inputs)
-        self.embedding = outputs.last_hidden_state.mean(dim=1).squeeze()
-
+    def iter_nodes(self):
+        yield self
         for child in self.children:
-            child.compute_embedding()
+            yield from child.iter_nodes()
+
+    @staticmethod
+    def embeddings_by_name(data):
+        """Map node names to their stored embeddings in a tree dict."""
+        embeddings = {}
+        stack = [data] if data else []
+        while stack:
+            node = stack.pop()
+            if node.get('embedding') is not None:
+                embeddings[node['name']] = node['embedding']
+            stack.extend(node.get('children') or [])
+        return embeddings
+
+    def compute_embedding(self, previous=None):
+        """Embed every node name of the tree in padded batches.
+
+        Names that already have an embedding in previous (the stored tree dict)
+        reuse it instead of going through BERT again.
+        """
+        known = TreeNode.embeddings_by_name(previous)
+        nodes = list(self.iter_nodes())
+        missing = list(dict.fromkeys(node.name for node in nodes if node.name not in known))
+        if missing:
+            known.update(zip(missing, get_bert_embeddings(missing)))
+
+        for node in nodes:
+            node.embedding = np.asarray(known[node.name], dtype=np.float32)
+
+def find_node(tree_dict, node_id):
+    """Locate a node in a stored tree dict.
+
+    Returns (node, parent, field_path) where field_path is the dotted Mongo
+    path of the node inside the classification_tree document ('' for root).
+    """
+    stack = [(tree_dict, None, '')]
+    while stack:
+        node, parent, path = stack.pop()
+        if node.get('id') == node_id:
+            return node, parent, path
+        for index, child in enumerate(node.get('children') or []):
+            stack.append((child, node, f"{path}.children.{index}" if path else f"children.{index}"))
+    return None, None, None
+
+def max_node_id(tree_dict):
+    stack, max_id = [tree_dict], 0
+    while stack:
+        node = stack.pop()
+        max_id = max(max_id, node.get('id') or 0)
+        stack.extend(node.get('children') or [])
+    return max_id
+
+def field(path, name):
+    return f"{path}.{name}" if path else name
+
+def embed_node_name(tree_dict, name):
+    known = TreeNode.embeddings_by_name(tree_dict)
+    if name in known:
+        return known[name]
+    return get_bert_embeddings([name])[0].tolist()
+
+def apply_node_change(tree_dict, update):
+    """Write a node-level change to the stored tree and refresh the leaf matrix.
+
+    The update is applied only if the stored tree still has the version it was
+    read at. Leaf-matrix rows whose path text is unchanged are reused, so only
+    the paths touched by the change are embedded again.
+    """
+    old_version = tree_dict.get('version')
+    new_version = new_tree_version()
+    update.setdefault('$set', {})['version'] = new_version
+
+    result = db.classification_tree.update_one({'_id': tree_dict['_id'], 'version': old_version}, update)
+    if result.matched_count == 0:
+        raise Exception("version: Tree was modified concurrently, reload it and try again")
+
+    tree_dict['version'] = new_version
+    previous_matrix = load_leaf_matrix(db, old_version) if old_version else None
+    leaf_paths, leaf_vectors = build_leaf_matrix(tree_dict, previous=previous_matrix)
+    save_leaf_matrix(db, new_version, leaf_paths, leaf_vectors)
+
+def node_error(action, e, status=400):
+    error_message = str(e)
+    return jsonify({
+        'notif': {
+            'type': "danger",
+            'msg': f"Failed to {action} node: {error_message}",
+        },
+        'error': {
+            'field': error_message.split(": ")[0] if ": " in error_message else 'General',
+            'msg': error_message.split(": ")[1] if ": " in error_message else error_message,
+        }
+    }), status
 
 @tree_model_bp.route('/', methods=['POST'])
 @swag_from({
@@ -120,10 +205,16 @@ def save_tree():
     try:
         tree_data = request.json
         tree = TreeNode.from_dict(tree_data)
-        tree.compute_embedding()
+        stored_tree = db.classification_tree.find_one()
+        tree.compute_embedding(previous=stored_tree)
         tree_dict = tree.to_dict()
+        tree_dict['version'] = new_tree_version()
 
+        # Build the leaf-path matrix the classifier loads, versioned with this tree
+        previous_matrix = load_leaf_matrix(db, stored_tree.get('version')) if stored_tree else None
+        leaf_paths, leaf_vectors = build_leaf_matrix(tree_dict, previous=previous_matrix)
         db.classification_tree.replace_one({}, tree_dict, upsert=True)
+        save_leaf_matrix(db, tree_dict['version'], leaf_paths, leaf_vectors)
         return jsonify({
             'notif': {
                 'type': "success",
@@ -219,3 +310,144 @@ def load_tree():
             }
         })
 
+@tree_model_bp.route('/node', methods=['POST'])
+@swag_from({
+    'summary': 'Add a tree node',
+    'description': 'Add a node under an existing parent. Only the new node is embedded and the stored tree is patched in place.',
+    'parameters': [
+        {
+            'name': 'body',
+            'in': 'body',
+            'required': True,
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'parent_id': {'type': 'integer', 'example': 1},
+                    'id': {'type': 'integer', 'example': 2},
+                    'name': {'type': 'string', 'example': 'Keyword'}
+                }
+            }
+        }
+    ],
+    'responses': {
+        200: {'description': 'Node added successfully'},
+        400: {'description': 'Failed to add node'},
+        404: {'description': 'Parent node not found'}
+    }
+})
+def add_node():
+    try:
+        node_data = request.json
+        tree_dict = db.classification_tree.find_one()
+        if not tree_dict:
+            tree = TreeNode(id=1, name='Root')
+            tree.compute_embedding()
+            tree_dict = tree.to_dict()
+            tree_dict['version'] = new_tree_version()
+            db.classification_tree.insert_one(tree_dict)
+
+        parent, _, parent_path = find_node(tree_dict, node_data.get('parent_id'))
+        if parent is None:
+            return node_error('add', Exception(f"parent_id: Node {node_data.get('parent_id')} not found"), 404)
+
+        node_id = node_data.get('id') or max_node_id(tree_dict) + 1
+        if find_node(tree_dict, node_id)[0] is not None:
+            return node_error('add', Exception(f"id: Node {node_id} already exists"))
+
+        name = node_data.get('name', '')
+        node = {'id': node_id, 'name': name, 'embedding': embed_node_name(tree_dict, name), 'children': []}
+        parent.setdefault('children', []).append(node)
+        apply_node_change(tree_dict, {'$push': {field(parent_path, 'children'): node}})
+
+        return jsonify({
+            'data': {'id': node_id, 'name': name, 'children': []},
+            'notif': {
+                'type': "success",
+                'msg': "Node added successfully"
+            }
+        })
+    except Exception as e:
+        return node_error('add', e)
+
+@tree_model_bp.route('/node/<int:node_id>', methods=['PUT'])
+@swag_from({
+    'summary': 'Rename a tree node',
+    'description': 'Rename a node. Only the renamed node and the leaf paths below it are embedded again.',
+    'parameters': [
+        {'name': 'node_id', 'in': 'path', 'type': 'integer', 'required': True},
+        {
+            'name': 'body',
+            'in': 'body',
+            'required': True,
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'name': {'type': 'string', 'example': 'Keyword'}
+                }
+            }
+        }
+    ],
+    'responses': {
+        200: {'description': 'Node updated successfully'},
+        400: {'description': 'Failed to update node'},
+        404: {'description': 'Node not found'}
+    }
+})
+def update_node(node_id):
+    try:
+        name = request.json.get('name', '')
+        tree_dict = db.classification_tree.find_one()
+        node, _, path = find_node(tree_dict, node_id) if tree_dict else (None, None, None)
+        if node is None:
+            return node_error('update', Exception(f"id: Node {node_id} not found"), 404)
+
+        if node['name'] != name:
+            node['embedding'] = embed_node_name(tree_dict, name)
+            node['name'] = name
+            apply_node_change(tree_dict, {'$set': {field(path, 'name'): name, field(path, 'embedding'): node['embedding']}})
+
+        return jsonify({
+            'data': {'id': node_id, 'name': name},
+            'notif': {
+                'type': "success",
+                'msg': "Node updated successfully"
+            }
+        })
+    except Exception as e:
+        return node_error('update', e)
+
+@tree_model_bp.route('/node/<int:node_id>', methods=['DELETE'])
+@swag_from({
+    'summary': 'Delete a tree node',
+    'description': 'Delete a node and its subtree. No embedding is recomputed unless the parent becomes a leaf.',
+    'parameters': [
+        {'name': 'node_id', 'in': 'path', 'type': 'integer', 'required': True}
+    ],
+    'responses': {
+        200: {'description': 'Node deleted successfully'},
+        400: {'description': 'Failed to delete node'},
+        404: {'description': 'Node not found'}
+    }
+})
+def delete_node(node_id):
+    try:
+        tree_dict = db.classification_tree.find_one()
+        node, parent, path = find_node(tree_dict, node_id) if tree_dict else (None, None, None)
+        if node is None:
+            return node_error('delete', Exception(f"id: Node {node_id} not found"), 404)
+        if parent is None:
+            return node_error('delete', Exception("id: The root node cannot be deleted"))
+
+        parent['children'] = [child for child in parent['children'] if child.get('id') != node_id]
+        parent_path = path.rsplit('.children.', 1)[0] if '.children.' in path else ''
+        apply_node_change(tree_dict, {'$pull': {field(parent_path, 'children'): {'id': node_id}}})
+
+        return jsonify({
+            'data': {'id': node_id},
+            'notif': {
+                'type': "success",
+                'msg': "Node deleted successfully"
+            }
+        })
+    except Exception as e:
+        return node_error('delete', e)
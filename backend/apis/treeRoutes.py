@@ -1,19 +1,24 @@
-from flask import Flask, Blueprint, jsonify
-from transformers import BertTokenizer, BertModel, pipeline
+from flask import Flask, Blueprint, Response, jsonify, request, stream_with_context
 from flasgger import swag_from
 import numpy as np
-import torch
+import hashlib
+from itertools import islice
 import logging
-import re
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from sklearn.metrics.pairwise import cosine_similarity as sk_cosine_similarity
-import string
+import os
 from bson import ObjectId
 import json
 from datetime import datetime
 from config.DBs import get_db
+from config.embeddingStore import EmbeddingStore
+from config.embeddings import EMBEDDING_MODEL_ID, get_bert_embeddings
+from config.treeIndex import load_leaf_scorer
+from config.ticketIndex import TICKET_INDEX_SAVE_INTERVAL, get_ticket_index
+from config.jobs import JobRunner
+from config.bulkWriter import BulkWriter
+from config.summaryCache import get_summary_cache
+from config.modelRegistry import CLASSIFICATION_QA_MODEL, NER_MODEL, run_ner, run_qa
+from config.preprocessing import missing_preprocessing_resources, preprocess_many
+from pymongo import DeleteMany, DeleteOne, UpdateOne
 
 # Initialize Flask app and Blueprint
 app = Flask(__name__)
@@ -22,58 +27,11 @@ classification_bp = Blueprint('classification_bp', __name__)
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 
-# Load pre-trained BERT model and tokenizer once
-tokenizer = BertTokenizer.from_pretrained('bert-base-uncased')
-model = BertModel.from_pretrained('bert-base-uncased')
-qa_pipeline = pipeline("question-answering", model="bert-base-multilingual-cased")
-ner_pipeline = pipeline("ner", model="dslim/bert-large-NER")
-
-# Download necessary NLTK data
-nltk.download('punkt')
-nltk.download('stopwords')
-
-# Set stopwords
-stop_words = set(stopwords.words('english') + stopwords.words('french'))
-
-def preprocess_text(text):
-    if text is None:
-        return ''
-    text = text.lower()
-    text = re.sub(r'https?://\S+|www\.\S+', '', text)
-    text = text.translate(str.maketrans('', '', string.punctuation))
-    tokens = word_tokenize(text)
-    tokens = [word for word in tokens if word not in stop_words]
-    return ' '.join(tokens)
-
-def get_bert_embeddings(texts):
-    inputs = tokenizer(texts, return_tensors='pt', padding=True, truncation=True)
-    with torch.no_grad():
-        outputs = model(**inputs)
-    return outputs.last_hidden_state.mean(dim=1).detach().numpy()
-
-def get_leaf_paths(tree, current_path=[]):
-    if "children" not in tree or not tree["children"]:
-        return [' -> '.join(current_path + [tree["name"]])]
-    paths = []
-    for child in tree["children"]:
-        paths.extend(get_leaf_paths(child, current_path + [tree["name"]]))
-    return paths
-
-def classify_ticket_dfs(ticket_vector, node, current_path, X_paths, leaf_paths, threshold=0.5):
-    similarities = []
-    if "children" in node and node["children"]:
-        for child in node["children"]:
-            similarities.extend(classify_ticket_dfs(ticket_vector, child, current_path + [node["name"]], X_paths, leaf_paths, threshold))
-    else:
-        path = ' -> '.join(current_path + [node["name"]])
-        try:
-            path_index = leaf_paths.index(path)
-            path_vector = X_paths[path_index].reshape(1, -1)
-            similarity = sk_cosine_similarity(ticket_vector, path_vector)[0][0]
-            similarities.append((path, similarity))
-        except Exception as e:
-            logging.error(f'Error processing path {path}: {e}')
-    return similarities
+# Number of tickets preprocessed, embedded and summarized together
+CLASSIFICATION_CHUNK_SIZE = int(os.getenv('CLASSIFICATION_CHUNK_SIZE', 256))
+
+# Classification runs in the background on this pool instead of inside the HTTP request
+classification_jobs = JobRunner(max_workers=int(os.getenv('CLASSIFICATION_WORKERS', 1)))
 
 # Custom JSON encoder to handle ObjectId and numpy.float32
 class JSONEncoder(json.JSONEncoder):
@@ -82,89 +40,366 @@ class JSONEncoder(json.JSONEncoder):
             return str(obj)
         if isinstance(obj, np.float32):
             return float(obj)
+        if isinstance(obj, datetime):
+            return obj.isoformat()
         return json.JSONEncoder.default(self, obj)
 
 app.json_encoder = JSONEncoder
 
-def check_for_person_name(text, ner_pipeline, threshold=0.3):
-    text = preprocess_text(text)
-    results = ner_pipeline(text)
-    for entity in results:
-        if entity['score'] > threshold and 'PER' in entity['entity']:
-            return True
-    return False
-
 def is_trivial_answer(answer):
     trivial_answers = {"comment", "comment by", "none", "nothing", "n/a"}
     return answer and answer.strip().lower() in trivial_answers
 
-def generate_comments_summary(jira_id):
-    db = get_db()
-    ticket = db.jira_tickets.find_one({'ID': jira_id})
-    if not ticket:
-        return None, 404
-    
-    comments = ticket.get('Comments', [])
-    if not comments:
-        return "No comments available for this ticket.", 200
-
-    query = "What are they talking about?"
-    summary_points = []
-
-    for comment in comments:
-        comment = comment.strip()
-        if not comment or is_trivial_answer(comment):
-            continue
+DESCRIPTION_QUESTION = "What problem is described?"
+COMMENTS_QUESTION = "What are they talking about?"
 
-        answer = qa_pipeline(question=query, context=comment)
-        answer_text = answer['answer']
+def answer_questions(pairs):
+    """Answer (question, context) pairs, running the QA pipeline in batches for uncached pairs only."""
+    if not pairs:
+        return []
+    return get_summary_cache().lookup(
+        CLASSIFICATION_QA_MODEL, pairs, lambda items: run_qa(CLASSIFICATION_QA_MODEL, items), task='answer'
+    )
+
+def find_person_names(texts, threshold=0.3):
+    """One flag per text telling whether NER finds a person name in it, using cached results when available."""
+    preprocessed = preprocess_many(texts)
+    to_check = [index for index, text in enumerate(preprocessed) if text]
+    flags = [False] * len(texts)
+    if to_check:
+        def has_person(items):
+            return [any(entity['score'] > threshold and 'PER' in entity['entity'] for entity in entities)
+                    for entities in run_ner(NER_MODEL, [text for _, text in items])]
+
+        checked = get_summary_cache().lookup(
+            NER_MODEL,
+            [(None, preprocessed[index]) for index in to_check],
+            has_person,
+            task='has_person',
+            params={'threshold': threshold}
+        )
+        for index, flag in zip(to_check, checked):
+            flags[index] = flag
+    return flags
+
+def filter_answers(answers):
+    """Replace trivial answers and answers naming a person by None."""
+    candidates = [index for index, answer in enumerate(answers) if not is_trivial_answer(answer)]
+    has_person = find_person_names([answers[index] for index in candidates])
+    kept = [None] * len(answers)
+    for index, person in zip(candidates, has_person):
+        if not person:
+            kept[index] = answers[index]
+    return kept
+
+def summarize_tickets(tickets):
+    """Build (description_summary, comments_summary) for every ticket in one QA pass and one NER pass.
+
+    All (question, context) pairs of the batch are answered together, then all
+    non-trivial answers go through NER together, and the results are mapped
+    back to their ticket.
+    """
+    pairs, owners = [], []
+    for ticket_index, ticket in enumerate(tickets):
+        description = ticket.get('Description', '')
+        if description:
+            pairs.append((DESCRIPTION_QUESTION, description))
+            owners.append((ticket_index, 'description'))
+        for comment in ticket.get('Comments') or []:
+            comment = comment.strip()
+            if comment and not is_trivial_answer(comment):
+                pairs.append((COMMENTS_QUESTION, comment))
+                owners.append((ticket_index, 'comment'))
+
+    answers = filter_answers(answer_questions(pairs))
+
+    description_summaries = [None] * len(tickets)
+    comment_points = [[] for _ in tickets]
+    for (ticket_index, kind), answer in zip(owners, answers):
+        if kind == 'description':
+            description_summaries[ticket_index] = answer
+        elif answer is not None:
+            comment_points[ticket_index].append(answer)
+
+    summaries = []
+    for ticket, description_summary, points in zip(tickets, description_summaries, comment_points):
+        if not ticket.get('Comments'):
+            comments_summary = "No comments available for this ticket."
+        elif not points:
+            comments_summary = "No significant comments to summarize."
+        else:
+            comments_summary = " ".join(points)
+        summaries.append((description_summary, comments_summary))
+    return summaries
+
+TICKET_SUMMARY_TEMPLATE = (
+    "The Jira ticket {ID} titled '{Title}' was created on {Created} "
+    "and last modified on {Updated}. Currently, it is {Status}. "
+    "The project related to this ticket is {Project}, with the component {Component}. "
+    "It is a {Type} and has a resolution status of '{Resolution}'."
+)
+TICKET_SUMMARY_DEFAULTS = {
+    'ID': 'Unknown ID',
+    'Title': 'No Title',
+    'Created': 'Unknown Date',
+    'Updated': 'Unknown Date',
+    'Status': 'No Status',
+    'Project': 'No Project',
+    'Component': 'No Component',
+    'Type': 'No Type',
+    'Resolution': 'No Resolution',
+}
+
+def generate_ticket_summary(ticket, sum_comm=None):
+    """One-paragraph summary of a ticket document, ending with its comments summary when there is one."""
+    summary = TICKET_SUMMARY_TEMPLATE.format_map({
+        field: ticket.get(field, default) for field, default in TICKET_SUMMARY_DEFAULTS.items()
+    })
+    if sum_comm:
+        summary += f" The comments are talking about: {sum_comm}."
+    return summary
+
+class ClassificationError(Exception):
+    def __init__(self, message, status=500):
+        super().__init__(message)
+        self.status = status
+
+def iter_tickets(db, page_size=None):
+    """Yield every Jira ticket, paging by _id so no cursor stays open while a chunk is processed."""
+    page_size = page_size or CLASSIFICATION_CHUNK_SIZE
+    last_id = None
+    while True:
+        query = {'_id': {'$gt': last_id}} if last_id is not None else {}
+        page = list(db.jira_tickets.find(query).sort('_id', 1).limit(page_size))
+        if not page:
+            return
+        yield from page
+        last_id = page[-1]['_id']
+
+def load_classification_inputs(db):
+    """Fetch the classification tree and an iterator over every Jira ticket, or raise ClassificationError.
+
+    Returns (classification_tree, issues, total).
+    """
+    try:
+        classification_tree = db.classification_tree.find_one()
+    except Exception as e:
+        logging.error(f'Error fetching classification tree: {e}')
+        raise ClassificationError('Error fetching classification tree')
+    if not classification_tree:
+        logging.error('Classification tree not found.')
+        raise ClassificationError('Classification tree not found', 404)
+
+    try:
+        total = db.jira_tickets.count_documents({})
+        issues = iter_tickets(db)
+    except Exception as e:
+        logging.error(f'Error fetching Jira tickets: {e}')
+        raise ClassificationError('Error fetching Jira tickets')
+    if not total:
+        logging.error('No Jira tickets found.')
+        raise ClassificationError('No Jira tickets found', 404)
+
+    return classification_tree, issues, total
+
+# Ticket fields that feed the classification, summaries and ticket summary
+CONTENT_FIELDS = ('Title', 'Description', 'Comments', 'Status', 'Project', 'Component', 'Type', 'Resolution', 'Created', 'Updated')
+
+def ticket_content_hash(issue):
+    content = {field: issue.get(field) for field in CONTENT_FIELDS}
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def select_changed_issues(db, classification_tree, issues):
+    """Split tickets for an incremental run.
+
+    Returns (changed, rescore_only, unchanged_count). changed tickets are new
+    or were updated since their stored result. rescore_only maps the jira_id
+    of tickets whose content is unchanged but were matched against another
+    tree version to their stored result, so their summaries can be reused.
+    Tickets skipped for lack of a usable description count as unchanged until
+    their content changes.
+    """
+    tree_version = classification_tree.get('version')
+    skipped_hashes = {
+        doc['jira_id']: doc.get('content_hash')
+        for doc in db.skipped_issues.find({}, {'jira_id': 1, 'content_hash': 1}) if 'jira_id' in doc
+    }
+    stored_results = {
+        doc['jira_id']: doc for doc in db.matched_issues.find(
+            {},
+            {'jira_id': 1, 'source_updated': 1, 'content_hash': 1, 'tree_version': 1,
+             'description_summary': 1, 'comments_summary': 1}
+        ) if 'jira_id' in doc
+    }
+
+    changed, rescore_only, unchanged_count = [], {}, 0
+    for issue in issues:
+        stored = stored_results.get(str(issue['_id']))
+        if skipped_hashes.get(str(issue['_id'])) == ticket_content_hash(issue):
+            unchanged_count += 1
+        elif (not stored or stored.get('source_updated') != issue.get('Updated')
+                or stored.get('content_hash') != ticket_content_hash(issue)):
+            changed.append(issue)
+        elif stored.get('tree_version') != tree_version:
+            changed.append(issue)
+            rescore_only[stored['jira_id']] = stored
+        else:
+            unchanged_count += 1
+    return changed, rescore_only, unchanged_count
+
+def classify_issues(db, classification_tree, issues, total, on_progress=None, rescore_only=None, writer=None):
+    """Classify tickets against the tree, upsert each result and yield it.
+
+    issues may be any iterable; it is consumed in chunks of
+    CLASSIFICATION_CHUNK_SIZE tickets so memory does not grow with the backlog. on_progress(done, total)
+    is called after every ticket; raising from it stops the run. Tickets
+    listed in rescore_only keep their stored description and comment
+    summaries and are only matched again. Upserts go through writer (a
+    BulkWriter on matched_issues), whose errors the caller reads once the
+    generator is exhausted.
+    """
+    rescore_only = rescore_only or {}
+    writer = writer or BulkWriter(db.matched_issues)
+    scorer = load_leaf_scorer(db, classification_tree)
+    embedding_store = EmbeddingStore(db, EMBEDDING_MODEL_ID)
+    ticket_index = get_ticket_index(db)
+    issues = iter(issues)
+    done = 0
+    try:
+        while True:
+            chunk = list(islice(issues, CLASSIFICATION_CHUNK_SIZE))
+            if not chunk:
+                break
+            for matched_issue in classify_chunk(db, classification_tree, chunk, scorer, embedding_store, rescore_only, writer, ticket_index):
+                yield matched_issue
+                done += 1
+                logging.info(f'Progress: {int(done / total * 100) if total else 100}%')
+                if on_progress:
+                    on_progress(done, total)
+    finally:
+        # Also persist what was buffered when the run is cancelled or fails
+        writer.flush()
+        ticket_index.save(min_interval=TICKET_INDEX_SAVE_INTERVAL)
+
+def classify_chunk(db, classification_tree, issues, scorer, embedding_store, rescore_only, writer, ticket_index=None):
+    # Preprocess the whole chunk up front so its descriptions can be embedded in batches
+    preprocessed_tickets = preprocess_many(issue.get('Description', '') for issue in issues)
+    embeddable_indices = [
+        index for index, issue in enumerate(issues)
+        if issue.get('Description', '') and preprocessed_tickets[index].strip()
+    ]
+    # Reuse stored ticket embeddings; only new or edited descriptions go through BERT
+    embedding_keys, ticket_vectors = embedding_store.embed(
+        [preprocessed_tickets[index] for index in embeddable_indices], get_bert_embeddings
+    )
+    key_updates = [
+        UpdateOne({'_id': issues[index]['_id']}, {'$set': {'EmbeddingKey': key}})
+        for index, key in zip(embeddable_indices, embedding_keys)
+        if issues[index].get('EmbeddingKey') != key
+    ]
+    if key_updates:
+        db.jira_tickets.bulk_write(key_updates, ordered=False)
+    if ticket_index is not None:
+        # Keep the similar-ticket index current with the vectors just computed or reused
+        new_rows = [
+            row for row, index in enumerate(embeddable_indices)
+            if ticket_index.key_of(str(issues[index]['_id'])) != embedding_keys[row]
+        ]
+        if new_rows:
+            ticket_index.add(
+                [str(issues[embeddable_indices[row]]['_id']) for row in new_rows],
+                [embedding_keys[row] for row in new_rows],
+                ticket_vectors[new_rows]
+            )
+    ticket_matches = dict(zip(embeddable_indices, scorer.top_matches(ticket_vectors, k=3, threshold=0.5)))
 
-        if not is_trivial_answer(answer_text) and not check_for_person_name(answer_text, ner_pipeline):
-            summary_points.append(answer_text)
+    # Summarize every matched ticket of the chunk in one batched QA/NER pass
+    to_summarize = [index for index in embeddable_indices if str(issues[index]['_id']) not in rescore_only]
+    summaries = dict(zip(to_summarize, summarize_tickets([issues[index] for index in to_summarize])))
 
-    if not summary_points:
-        return "No significant comments to summarize.", 200
+    description_summaries, comment_summaries = {}, {}
+    for index, issue in enumerate(issues):
+        stored = rescore_only.get(str(issue['_id']))
+        if index not in ticket_matches:
+            comment_summaries[index] = ''
+        elif stored:
+            description_summaries[index] = stored.get('description_summary')
+            comment_summaries[index] = stored.get('comments_summary')
+        else:
+            description_summaries[index], comment_summaries[index] = summaries[index]
+    ticket_summaries = [generate_ticket_summary(issue, comment_summaries[index]) for index, issue in enumerate(issues)]
+
+    # Skipped tickets get no matched_issues record; remember their content so incremental runs pass over them,
+    # and forget the skip of tickets that match now
+    skipped_updates = [
+        UpdateOne(
+            {'jira_id': str(issue['_id'])},
+            {'$set': {'jira_id': str(issue['_id']), 'source_updated': issue.get('Updated'), 'content_hash': ticket_content_hash(issue)}},
+            upsert=True
+        )
+        for index, issue in enumerate(issues) if index not in ticket_matches
+    ]
+    matched_ids = [str(issues[index]['_id']) for index in ticket_matches]
+    if matched_ids:
+        skipped_updates.append(DeleteMany({'jira_id': {'$in': matched_ids}}))
+    if skipped_updates:
+        db.skipped_issues.bulk_write(skipped_updates, ordered=False)
 
-    return " ".join(summary_points), 200
+    for index, issue in enumerate(issues):
+        description = issue.get('Description', '')
+        if index not in ticket_matches:
+            logging.warning(f"Issue {issue['_id']} has no meaningful content or description, skipping.")
+            # Drop the result of an earlier run, when the ticket still had a usable description
+            writer.add(DeleteOne({'jira_id': str(issue['_id'])}), ref=str(issue['_id']))
 
-def generate_description_summary(description):
-    if not description:
-        return None, 200
+            yield {
+                'issue': description,
+                'best_matches': None,
+                'jira_id': str(issue['_id']),
+                'ticket_summary': ticket_summaries[index]
+            }
+            continue
 
-    query = "What problem is described?"
-    answer = qa_pipeline(question=query, context=description)
-    answer_text = answer['answer']
+        best_matches = [{'path': path, 'similarity_score': score} for path, score in ticket_matches[index]]
+        sum_desc, sum_comm = description_summaries[index], comment_summaries[index]
+        ticket_summary = ticket_summaries[index]
 
-    if is_trivial_answer(answer_text) or check_for_person_name(answer_text, ner_pipeline):
-        return None, 200
-    
-    return answer_text, 200
+        matched_issue = {
+            'issue': {**issue, '_id': str(issue['_id'])},
+            'best_matches': best_matches,
+            'jira_id': str(issue['_id']),
+            'ticket_summary': ticket_summary,
+            'description_summary': sum_desc,  # Include description summary separately
+            'comments_summary': sum_comm,
+            'source_updated': issue.get('Updated'),
+            'content_hash': ticket_content_hash(issue),
+            'tree_version': classification_tree.get('version')
+        }
 
-def generate_ticket_summary(jira_id, title, status, project, component, ticket_type, resolution, sum_comm=None):
-    db = get_db()
-    ticket = db.jira_tickets.find_one({'ID': jira_id})
-    if not ticket:
-        return jsonify({'error': 'Ticket not found'}), 404
-    
-    created_date = ticket.get('Created', 'Unknown Date')
-    updated_date = ticket.get('Updated', 'Unknown Date')
-    summary = (
-        f"The Jira ticket {jira_id} titled '{title}' was created on {created_date} "
-        f"and last modified on {updated_date}. Currently, it is {status}. "
-        f"The project related to this ticket is {project}, with the component {component}. "
-        f"It is a {ticket_type} and has a resolution status of '{resolution}'."
-    )
+        logging.debug(f'Matched issue: {matched_issue}')
 
-    if sum_comm:
-        summary += f" The comments are talking about: {sum_comm}."
+        writer.add(
+            UpdateOne({'jira_id': matched_issue['jira_id']}, {'$set': matched_issue}, upsert=True),
+            ref=matched_issue['jira_id']
+        )
 
-    return summary
+        yield matched_issue
 
 @classification_bp.route('/match_issues', methods=['GET'])
 @swag_from({
     'tags': ['Classification'],
     'summary': 'Match issues to tree nodes',
     'description': 'Fetches issues from the database, applies BERT tokenization, and returns the best matching tree node for each issue along with progress percentage.',
+    'parameters': [
+        {
+            'name': 'mode',
+            'in': 'query',
+            'type': 'string',
+            'enum': ['full', 'incremental'],
+            'default': 'full',
+            'description': 'incremental only processes tickets that are new, changed since their stored result, or were matched against an older tree version'
+        }
+    ],
     'responses': {
         200: {
             'description': 'Best matching nodes for issues and progress percentage',
@@ -182,6 +417,8 @@ def generate_ticket_summary(jira_id, title, status, project, component, ticket_t
                             'ticket_summary': 'Generated summary here...'
                         }
                     ],
+                    'unchanged_count': 0,
+                    'write_errors': [],
                     'progress_percentage': 100
                 }
             }
@@ -201,110 +438,162 @@ def match_issues():
     db = get_db()
 
     try:
-        classification_tree = db.classification_tree.find_one()
-        if not classification_tree:
-            logging.error('Classification tree not found.')
-            return jsonify({'error': 'Classification tree not found'}), 404
-    except Exception as e:
-        logging.error(f'Error fetching classification tree: {e}')
-        return jsonify({'error': 'Error fetching classification tree'}), 500
+        classification_tree, issues, total, rescore_only, unchanged_count = prepare_classification(db, request.args.get('mode', 'full'))
+    except ClassificationError as e:
+        return jsonify({'error': str(e)}), e.status
 
-    leaf_paths = get_leaf_paths(classification_tree)
-    X_paths = get_bert_embeddings(leaf_paths)
+    writer = BulkWriter(db.matched_issues)
+    matched = classify_issues(db, classification_tree, issues, total, rescore_only=rescore_only, writer=writer)
 
+    if request.args.get('stream', 'false').lower() in ('1', 'true'):
+        return Response(stream_with_context(stream_matched_issues(matched, writer, unchanged_count)), mimetype='application/x-ndjson')
+
+    try:
+        matched_issues = list(matched)
+    except ClassificationError as e:
+        return jsonify({'error': str(e)}), e.status
+
+    return jsonify({
+        'matched_issues': matched_issues,
+        'unchanged_count': unchanged_count,
+        'write_errors': writer.errors,
+        'progress_percentage': 100
+    })
+
+def stream_matched_issues(matched, writer, unchanged_count):
+    """Yield one NDJSON line per classified ticket, then a final summary line."""
     try:
-        issues_cursor = db.jira_tickets.find()
-        issues = list(issues_cursor)
-        if not issues:
-            logging.error('No Jira tickets found.')
-            return jsonify({'error': 'No Jira tickets found'}), 404
+        for matched_issue in matched:
+            yield json.dumps(matched_issue, cls=JSONEncoder) + '\n'
     except Exception as e:
-        logging.error(f'Error fetching Jira tickets: {e}')
-        return jsonify({'error': 'Error fetching Jira tickets'}), 500
-
-    matched_issues = []
-    total_issues = len(issues)
-    progress_percentage = 0
-
-    for index, issue in enumerate(issues):
-        description = issue.get('Description', '')
-        preprocessed_ticket = preprocess_text(description)
-        if not preprocessed_ticket.strip() or not description:
-            logging.warning(f"Issue {issue['_id']} has no meaningful content or description, skipping.")
-            
-            matched_issues.append({
-                'issue': description,
-                'best_matches': None,
-                'jira_id': str(issue['_id']),
-                'ticket_summary': generate_ticket_summary(
-                    issue.get('ID', 'Unknown ID'),
-                    issue.get('Title', 'No Title'),
-                    issue.get('Status', 'No Status'),
-                    issue.get('Project', 'No Project'),
-                    issue.get('Component', 'No Component'),
-                    issue.get('Type', 'No Type'),
-                    issue.get('Resolution', 'No Resolution'),
-                    sum_comm=''
-                )
-            })
-            continue
-
-        ticket_vector = get_bert_embeddings([preprocessed_ticket])[0]
-
-        best_paths = classify_ticket_dfs(ticket_vector.reshape(1, -1), classification_tree, [], X_paths, leaf_paths, threshold=0.5)
-        if best_paths:
-            best_paths.sort(key=lambda x: x[1], reverse=True)
-            best_matches = [{'path': path, 'similarity_score': float(score)} for path, score in best_paths if score >= 0.5][:3]
-            if not best_matches:
-                best_matches = []
-        else:
-            best_matches = []
-
-        # Generate description summary
-        sum_desc, _ = generate_description_summary(description)
-
-        # Generate comments summary
-        sum_comm, status = generate_comments_summary(issue.get('ID', 'Unknown ID'))
-        if status != 200:
-            sum_comm = None
-
-        ticket_summary = generate_ticket_summary(
-            issue.get('ID', 'Unknown ID'),
-            issue.get('Title', 'No Title'),
-            issue.get('Status', 'No Status'),
-            issue.get('Project', 'No Project'),
-            issue.get('Component', 'No Component'),
-            issue.get('Type', 'No Type'),
-            issue.get('Resolution', 'No Resolution'),
-            sum_comm=sum_comm
-        )
-
-        matched_issue = {
-            'issue': json.loads(json.dumps(issue, cls=JSONEncoder)),  # Serialize the issue object correctly
-            'best_matches': best_matches,
-            'jira_id': str(issue['_id']),
-            'ticket_summary': ticket_summary,
-            'description_summary': sum_desc,  # Include description summary separately
-            'comments_summary': sum_comm
+        logging.error(f'Error while streaming matched issues: {e}')
+        yield json.dumps({'error': str(e)}) + '\n'
+        return
+    yield json.dumps({
+        'summary': {
+            'unchanged_count': unchanged_count,
+            'write_errors': writer.errors,
+            'progress_percentage': 100
         }
+    }, cls=JSONEncoder) + '\n'
+
+def prepare_classification(db, mode):
+    """Load inputs for a run; in incremental mode only changed tickets are kept.
+
+    Returns (classification_tree, issues, total, rescore_only, unchanged_count).
+    """
+    if mode not in ('full', 'incremental'):
+        raise ClassificationError(f"Unknown mode '{mode}', expected 'full' or 'incremental'", 400)
+    # Embedding keys, stored results and cached NER checks all derive from the preprocessed text
+    missing = missing_preprocessing_resources()
+    if missing:
+        raise ClassificationError(f"NLTK data {', '.join(missing)} is not available yet, retry once /system/ready reports it", 503)
+
+    classification_tree, issues, total = load_classification_inputs(db)
+    if mode == 'full':
+        return classification_tree, issues, total, {}, 0
+
+    # Make sure a legacy tree gets its version before comparing against stored results
+    load_leaf_scorer(db, classification_tree)
+    issues, rescore_only, unchanged_count = select_changed_issues(db, classification_tree, issues)
+    logging.info(f'Incremental run: {len(issues)} tickets to process, {unchanged_count} unchanged.')
+    return classification_tree, issues, len(issues), rescore_only, unchanged_count
+
+def run_classification_job(job, mode='full'):
+    db = get_db()
+    classification_tree, issues, total, rescore_only, _ = prepare_classification(db, mode)
+    job.set_progress(0, total)
 
-        logging.info(f'Matched issue: {matched_issue}')
-        matched_issues.append(matched_issue)
+    def on_progress(done, total):
+        job.set_progress(done, total)
+        job.check_cancelled()
 
-        try:
-            db.matched_issues.update_one(
-                {'jira_id': matched_issue['jira_id']},
-                {'$set': matched_issue},
-                upsert=True
-            )
-        except Exception as e:
-            logging.error(f"Error inserting matched issue into database: {e}")
-            return jsonify({'error': 'Error inserting matched issue into database'}), 500
+    writer = BulkWriter(db.matched_issues)
+    try:
+        for matched_issue in classify_issues(db, classification_tree, issues, total, on_progress=on_progress,
+                                             rescore_only=rescore_only, writer=writer):
+            job.add_result({'jira_id': matched_issue['jira_id'], 'best_matches': matched_issue['best_matches']})
+    finally:
+        job.add_errors(writer.errors)
 
-        progress_percentage = int((index + 1) / total_issues * 100)
-        logging.info(f'Progress: {progress_percentage}%')
+@classification_bp.route('/jobs', methods=['POST'])
+@swag_from({
+    'tags': ['Classification'],
+    'summary': 'Start a classification job',
+    'description': 'Queues the same work as /match_issues on a background worker and returns the job id immediately. If a classification job with the same mode is already queued or running, that job is returned. Only the most recent finished jobs keep their results. Jobs are kept in the memory of the process that started them, so the API must run as a single process (threads are fine) for the status and cancel endpoints to find them.',
+    'parameters': [
+        {
+            'name': 'mode',
+            'in': 'query',
+            'type': 'string',
+            'enum': ['full', 'incremental'],
+            'default': 'full',
+            'description': 'incremental only processes tickets that are new, changed since their stored result, or were matched against an older tree version'
+        }
+    ],
+    'responses': {
+        202: {
+            'description': 'Job accepted',
+            'examples': {
+                'application/json': {
+                    'job_id': '3f2b9c0e8d7a4b6c9e1f2a3b4c5d6e7f',
+                    'name': 'match_issues',
+                    'status': 'queued',
+                    'progress': {'done': 0, 'total': 0, 'percentage': 0},
+                    'results': [],
+                    'result_count': 0,
+                    'results_dropped': False,
+                    'error': None
+                }
+            }
+        }
+    }
+})
+def start_classification_job():
+    mode = request.args.get('mode', 'full')
+    if mode not in ('full', 'incremental'):
+        return jsonify({'error': f"Unknown mode '{mode}', expected 'full' or 'incremental'"}), 400
+    job = classification_jobs.submit('match_issues', lambda job: run_classification_job(job, mode), key=('match_issues', mode))
+    return jsonify(job.to_dict()), 202
+
+@classification_bp.route('/jobs/<job_id>', methods=['GET'])
+@swag_from({
+    'tags': ['Classification'],
+    'summary': 'Get classification job status',
+    'description': 'Returns the status, progress and results produced so far. Use offset to fetch only results not seen yet. Only the process that started the job knows it, hence 404 from any other API process.',
+    'parameters': [
+        {'name': 'job_id', 'in': 'path', 'type': 'string', 'required': True},
+        {'name': 'offset', 'in': 'query', 'type': 'integer', 'required': False, 'default': 0}
+    ],
+    'responses': {
+        200: {'description': 'Job status'},
+        404: {'description': 'Job not found'}
+    }
+})
+def get_classification_job(job_id):
+    job = classification_jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict(offset=request.args.get('offset', 0, type=int)))
 
-    return jsonify({'matched_issues': matched_issues, 'progress_percentage': progress_percentage})
+@classification_bp.route('/jobs/<job_id>', methods=['DELETE'])
+@swag_from({
+    'tags': ['Classification'],
+    'summary': 'Cancel a classification job',
+    'description': 'Requests cancellation; the job stops after the ticket it is currently processing. Results already upserted are kept. Like the status endpoint, it only finds jobs started by the same API process.',
+    'parameters': [
+        {'name': 'job_id', 'in': 'path', 'type': 'string', 'required': True}
+    ],
+    'responses': {
+        200: {'description': 'Cancellation requested'},
+        404: {'description': 'Job not found'}
+    }
+})
+def cancel_classification_job(job_id):
+    job = classification_jobs.cancel(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
 
 app.register_blueprint(classification_bp, url_prefix='/classification')
 
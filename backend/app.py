@@ -1,4 +1,5 @@
 import logging
+import multiprocessing
 from flask import Flask
 from flask_cors import CORS
 from flasgger import Swagger
@@ -12,7 +13,10 @@ from apis.treeRoutes import classification_bp
 from config.Jira import jira_blueprint
 from apis.bestMatchesRoutes import best_matches_bp
 from apis.questionAnswering import qa_bp
-import webview
+from apis.systemRoutes import system_bp
+from config.modelRegistry import start_warm_up
+from config.nltkResources import start_nltk_bootstrap
+from config.indexes import indexes_cli, start_index_bootstrap
 
 app = Flask(__name__)
 CORS(app)
@@ -30,8 +34,18 @@ app.register_blueprint(jira_bp, url_prefix='/jira')
 app.register_blueprint(jira_blueprint, url_prefix='/api')
 app.register_blueprint(best_matches_bp, url_prefix='/best_matches_bp')
 app.register_blueprint(qa_bp, url_prefix='/question-answering')
+app.register_blueprint(system_bp, url_prefix='/system')
 
 conf_db(app)
+# flask indexes ensure / flask indexes report
+app.cli.add_command(indexes_cli)
+
+# Models load in the background; /system/ready reports when they are all in memory.
+# Spawned worker processes (the preprocessing pool) re-import this module and must not start them again.
+if multiprocessing.parent_process() is None:
+    start_warm_up()
+    start_nltk_bootstrap()
+    start_index_bootstrap()
 
 if __name__ == '__main__':
        logging.basicConfig(level=logging.INFO)
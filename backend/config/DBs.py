@@ -1,6 +1,7 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, monitoring
 from dotenv import load_dotenv
 import os
+import threading
 
 # Load environment variables from .env file
 load_dotenv()
@@ -10,7 +11,119 @@ DB_NAMES = {
     'default': os.getenv('DB_DEFAULT'),
 }
 
+# Connection pool and timeouts of the shared MongoClient
+MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', 50))
+MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', 0))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv('MONGO_MAX_IDLE_TIME_MS', 60000))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', 10000))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', 10000))
+# 0 means no socket timeout, as long classification queries can legitimately take a while
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', 0))
+# Wire compression, e.g. "zstd,snappy,zlib" (zstd and snappy need their python packages; empty disables it)
+MONGO_COMPRESSORS = os.getenv('MONGO_COMPRESSORS', '')
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Counts connection pool events of the shared MongoClient."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {
+            'connections_created': 0,
+            'connections_closed': 0,
+            'checked_out': 0,
+            'checked_in': 0,
+            'check_out_failed': 0,
+            'pools_cleared': 0,
+        }
+
+    def _count(self, counter):
+        with self.lock:
+            self.counters[counter] += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._count('pools_cleared')
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._count('connections_created')
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._count('connections_closed')
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._count('check_out_failed')
+
+    def connection_checked_out(self, event):
+        self._count('checked_out')
+
+    def connection_checked_in(self, event):
+        self._count('checked_in')
+
+    def snapshot(self):
+        with self.lock:
+            stats = dict(self.counters)
+        stats['open_connections'] = stats['connections_created'] - stats['connections_closed']
+        stats['in_use'] = stats['checked_out'] - stats['checked_in']
+        return stats
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+pool_stats = PoolStats()
+
 # ONLY ONE INSTANCE OF MONGO CLIENT SHOULD BE USED IN THE APPLICATION
+def get_client():
+    """The process-wide MongoClient, created on first use.
+
+    A MongoClient must not be shared across fork(), so a forked worker
+    (gunicorn, a process pool) gets a fresh client the first time it asks.
+    That only holds for code that asks again after the fork: anything kept
+    across requests (module-level handles, singletons) must hold lazy_db(),
+    not the Database returned by get_db().
+    """
+    global _client, _client_pid, pool_stats
+    client = _client
+    if client is not None and _client_pid == os.getpid():
+        return client
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            if _client_pid != os.getpid():
+                pool_stats = PoolStats()
+            options = {
+                'maxPoolSize': MONGO_MAX_POOL_SIZE,
+                'minPoolSize': MONGO_MIN_POOL_SIZE,
+                'maxIdleTimeMS': MONGO_MAX_IDLE_TIME_MS,
+                'connectTimeoutMS': MONGO_CONNECT_TIMEOUT_MS,
+                'serverSelectionTimeoutMS': MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                'socketTimeoutMS': MONGO_SOCKET_TIMEOUT_MS or None,
+                'event_listeners': [pool_stats],
+                # No monitor threads or sockets until the first operation, so modules
+                # holding a db from import time are still safe to fork
+                'connect': False,
+            }
+            if MONGO_COMPRESSORS:
+                options['compressors'] = MONGO_COMPRESSORS
+            # The default database's URI, so credentials keep authenticating against it
+            _client = MongoClient(MONGO_URI + DB_NAMES['default'], **options)
+            _client_pid = os.getpid()
+        return _client
+
 def get_uris():
     mongo_uris = {}
     for db_name, db_uri in DB_NAMES.items():
@@ -18,11 +131,43 @@ def get_uris():
     return mongo_uris
 
 def get_db(db_name='default'):
-    mongo_uri = MONGO_URI + DB_NAMES.get(db_name, "")
-    if not mongo_uri:
+    if not MONGO_URI or not DB_NAMES.get(db_name):
         raise ValueError(f"Database '{db_name}' is not configured.")
-    client = MongoClient(mongo_uri)
-    return client[DB_NAMES[db_name]]
+    return get_client()[DB_NAMES[db_name]]
+
+class LazyDatabase:
+    """Stands for get_db(db_name), resolved again on every access.
+
+    Meant for module-level and other long-lived handles: they follow the
+    client of the current process, so a forked worker uses its own pool
+    instead of the client created before the fork.
+    """
+
+    def __init__(self, db_name='default'):
+        self._db_name = db_name
+
+    def __getattr__(self, name):
+        return getattr(get_db(self._db_name), name)
+
+    def __getitem__(self, name):
+        return get_db(self._db_name)[name]
+
+    def __repr__(self):
+        return f'LazyDatabase({self._db_name!r})'
+
+def lazy_db(db_name='default'):
+    return LazyDatabase(db_name)
+
+def get_pool_stats():
+    """Connection pool counters and settings of this process's MongoClient."""
+    return {
+        'pid': os.getpid(),
+        'client_created': _client is not None and _client_pid == os.getpid(),
+        'max_pool_size': MONGO_MAX_POOL_SIZE,
+        'min_pool_size': MONGO_MIN_POOL_SIZE,
+        'compressors': MONGO_COMPRESSORS or None,
+        **pool_stats.snapshot(),
+    }
 
 def conf_db(app):
     for db_name, mongo_uri in get_uris().items():
@@ -2,17 +2,170 @@ from flask import Blueprint, request, jsonify
 from flasgger import swag_from
 from jira import JIRA
 import json
+import os
 import requests
-from config.DBs import get_db
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from config.DBs import lazy_db
+from config.bulkWriter import BulkWriter
+from config.dedup import flag_duplicates, remember_fingerprints
+from config.ticketIndex import index_tickets
 from pymongo import UpdateOne
 
-db = get_db()
+db = lazy_db()
 jira_blueprint = Blueprint('jira', __name__)
 
+# Issue IDs looked up per $in query when diffing a sync against the stored tickets
+SYNC_LOOKUP_CHUNK_SIZE = 1000
+
+# Issues requested per Jira search call
+JIRA_PAGE_SIZE = int(os.getenv('JIRA_PAGE_SIZE', 100))
+# Search pages fetched in parallel
+JIRA_FETCH_WORKERS = int(os.getenv('JIRA_FETCH_WORKERS', 4))
+
+# Only the fields issue_to_dict reads are requested from Jira
+JIRA_FIELDS = [
+    'summary', 'description', 'status', 'created', 'updated', 'project', 'issuetype', 'resolution', 'comment',
+    'customfield_10000', 'customfield_10001', 'customfield_10002',
+]
+
+
+def fetch_issue_pages(connect, jql_query, page_size=None, workers=None):
+    """Yield pages of the issues matching jql_query, in the order they arrive.
+
+    The first page gives the total; the other pages are fetched on a pool of
+    workers threads, each with its own client from connect(). At most two
+    pages per worker are in flight, so pages the caller has not consumed yet
+    do not pile up in memory.
+    """
+    page_size = page_size or JIRA_PAGE_SIZE
+    workers = workers or JIRA_FETCH_WORKERS
+    clients = threading.local()
+
+    def fetch(jira, start):
+        return jira.search_issues(jql_query, startAt=start, maxResults=page_size, fields=JIRA_FIELDS)
+
+    def fetch_in_worker(start):
+        if not hasattr(clients, 'jira'):
+            clients.jira = connect()
+        return fetch(clients.jira, start)
+
+    first_page = fetch(connect(), 0)
+    yield first_page
+
+    starts = iter(range(len(first_page), first_page.total, page_size)) if len(first_page) else iter(())
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='jira-fetch') as executor:
+        pending = {executor.submit(fetch_in_worker, start) for start in islice(starts, 2 * workers)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+                start = next(starts, None)
+                if start is not None:
+                    pending.add(executor.submit(fetch_in_worker, start))
+
+
+def issue_to_dict(issue):
+    return {
+        'ID': issue.key,
+        'Title': issue.fields.summary,
+        'Description': issue.fields.description,
+        'Status': issue.fields.status.name,
+        'Created': issue.fields.created,
+        'Updated': issue.fields.updated,
+        'Project': issue.fields.project.key,
+        'Type': issue.fields.issuetype.name,
+        'Resolution': issue.fields.resolution.name if issue.fields.resolution else "Unresolved",
+        'Comments': [comment.body for comment in issue.fields.comment.comments] if issue.fields.comment.comments else None,
+        'SumDesc': issue.fields.customfield_10000 if hasattr(issue.fields, 'customfield_10000') else None,
+        'SumComm': issue.fields.customfield_10001 if hasattr(issue.fields, 'customfield_10001') else None,
+        'TicketSum': issue.fields.customfield_10002 if hasattr(issue.fields, 'customfield_10002') else None,
+        'Activated': True,  # Assuming 'activated' field is true by default
+        'Embedding': [],  # Placeholder for embeddings if needed
+    }
+
+
+def split_new_and_updated(db, issue_dicts):
+    """(new, updated) issue dicts: unknown IDs, and known IDs whose Jira Updated is newer than the stored one.
+
+    Stored (ID, Updated) pairs are read with one projected $in query per
+    SYNC_LOOKUP_CHUNK_SIZE issues and compared in memory; unchanged issues
+    are in neither list.
+    """
+    new_issues, updated_issues = [], []
+    for start in range(0, len(issue_dicts), SYNC_LOOKUP_CHUNK_SIZE):
+        chunk = issue_dicts[start:start + SYNC_LOOKUP_CHUNK_SIZE]
+        stored_updated = {
+            doc['ID']: doc.get('Updated')
+            for doc in db.jira_tickets.find({'ID': {'$in': [issue_dict['ID'] for issue_dict in chunk]}}, {'_id': 0, 'ID': 1, 'Updated': 1})
+        }
+        for issue_dict in chunk:
+            if issue_dict['ID'] not in stored_updated:
+                new_issues.append(issue_dict)
+            elif stored_updated[issue_dict['ID']] is None or stored_updated[issue_dict['ID']] < issue_dict['Updated']:
+                updated_issues.append(issue_dict)
+    return new_issues, updated_issues
+
+
+def sync_issues(db, connect, jql_query, page_size=None, workers=None):
+    """Fetch the issues matching jql_query and write the new and updated ones to db.jira_tickets.
+
+    connect() returns a Jira client (one per fetch worker). Each page is
+    diffed, deduplicated and queued for writing as soon as it arrives.
+    Returns a dict with the fetched issue dicts, the new, updated and
+    duplicate counts, and the write errors of the BulkWriter.
+    """
+    issues_list = []
+    new_issues_count = 0
+    updated_issues_count = 0
+    duplicates_count = 0
+
+    with BulkWriter(db.jira_tickets) as writer:
+        for page in fetch_issue_pages(connect, jql_query, page_size, workers):
+            page_issues = [issue_to_dict(issue) for issue in page]
+            issues_list.extend(page_issues)
+            new_issues, updated_issues = split_new_and_updated(db, page_issues)
+
+            # Fingerprint descriptions; new tickets are also flagged when they repeat an existing one
+            duplicates_count += flag_duplicates(db, new_issues)
+            flag_duplicates(db, updated_issues, check=False)
+
+            errors_before = len(writer.errors)
+            for issue_dict in updated_issues:
+                update = {'$set': issue_dict}
+                if 'SimHash' not in issue_dict:
+                    # Not fingerprinted (NLTK data missing): drop the old description's SimHash so it is backfilled
+                    update['$unset'] = {'SimHash': ''}
+                writer.add(UpdateOne({'ID': issue_dict['ID']}, update), ref=issue_dict['ID'])
+            for issue_dict in new_issues:
+                writer.add(UpdateOne({'ID': issue_dict['ID']}, {'$set': issue_dict}, upsert=True), ref=issue_dict['ID'])
+            new_issues_count += len(new_issues)
+            updated_issues_count += len(updated_issues)
+
+            # Later pages are checked against this one, so only what was actually written is remembered
+            writer.flush()
+            failed = {error['ref'] for error in writer.errors[errors_before:]}
+            written = [issue for issue in updated_issues + new_issues if issue['ID'] not in failed]
+            remember_fingerprints(db, written)
+            # New and edited descriptions become findable through /jira/<id>/similar right away
+            if written:
+                index_tickets(db, list(db.jira_tickets.find(
+                    {'ID': {'$in': [issue['ID'] for issue in written]}}, {'Description': 1}
+                )))
+
+    return {
+        'issues': issues_list,
+        'new_count': new_issues_count,
+        'updated_count': updated_issues_count,
+        'duplicates_count': duplicates_count,
+        'write_errors': writer.errors,
+    }
+
 @jira_blueprint.route('/download_jira_tickets', methods=['POST'])
 @swag_from({
     'summary': 'Download JIRA tickets',
-    'description': 'Downloads JIRA tickets from a specified JQL query and returns them as JSON.',
+    'description': 'Downloads JIRA tickets from a specified JQL query and returns them as JSON. Result pages (JIRA_PAGE_SIZE issues, only the mapped fields) are fetched on JIRA_FETCH_WORKERS threads and written to the database as they arrive.',
     'parameters': [
         {
             'name': 'body',
@@ -35,6 +188,8 @@ jira_blueprint = Blueprint('jira', __name__)
             'examples': {
                 'application/json': {
                     'message': 'Downloaded 10 issues from JIRA project KAN',
+                    'duplicates_count': 1,
+                    'write_errors': [],
                     'issues': [
                         {
                             'key': 'KAN-1',
@@ -73,64 +228,20 @@ def download_jira_tickets():
     jira_api_token = data['jira_api_token']
     jql_query = data['jql_query']
 
+    def connect():
+        return JIRA({'server': jira_server}, basic_auth=(jira_username, jira_api_token))
+
     try:
-        options = {'server': jira_server}
-        jira = JIRA(options, basic_auth=(jira_username, jira_api_token))
-        issues = jira.search_issues(jql_query, maxResults=False)
+        result = sync_issues(db, connect, jql_query)
 
-        if not issues:
+        if not result['issues']:
             return jsonify({'message': 'No issues found for the given JQL query', 'jql_query': jql_query}), 200
 
-        issues_list = []
-        new_issues_count = 0
-        update_operations = []
-
-        for issue in issues:
-            issue_dict = {
-                'ID': issue.key,
-                'Title': issue.fields.summary,
-                'Description': issue.fields.description,
-                'Status': issue.fields.status.name,
-                'Created': issue.fields.created,
-                'Updated': issue.fields.updated,
-                'Project': issue.fields.project.key,
-                'Type': issue.fields.issuetype.name,
-                'Resolution': issue.fields.resolution.name if issue.fields.resolution else "Unresolved",
-                'Comments': [comment.body for comment in issue.fields.comment.comments] if issue.fields.comment.comments else None,
-                'SumDesc': issue.fields.customfield_10000 if hasattr(issue.fields, 'customfield_10000') else None,
-                'SumComm': issue.fields.customfield_10001 if hasattr(issue.fields, 'customfield_10001') else None,
-                'TicketSum': issue.fields.customfield_10002 if hasattr(issue.fields, 'customfield_10002') else None,
-                'Activated': True,  # Assuming 'activated' field is true by default
-                'Embedding': [],  # Placeholder for embeddings if needed
-            }
-            issues_list.append(issue_dict)
-
-            existing_issue = db.jira_tickets.find_one({'ID': issue_dict['ID']})
-
-            if existing_issue:
-                if existing_issue['Updated'] < issue_dict['Updated']:
-                    update_operations.append(
-                        UpdateOne(
-                            {'ID': issue_dict['ID']},
-                            {'$set': issue_dict}
-                        )
-                    )
-            else:
-                update_operations.append(
-                    UpdateOne(
-                        {'ID': issue_dict['ID']},
-                        {'$set': issue_dict},
-                        upsert=True
-                    )
-                )
-                new_issues_count += 1
-
-        if update_operations:
-            db.jira_tickets.bulk_write(update_operations)
-
         response = {
-            'message': f'Downloaded and saved {new_issues_count} new issues from JIRA',
-            'issues': issues_list
+            'message': f"Downloaded and saved {result['new_count']} new issues from JIRA",
+            'duplicates_count': result['duplicates_count'],
+            'write_errors': result['write_errors'],
+            'issues': result['issues']
         }
         return jsonify(response), 200
 
@@ -7,7 +7,7 @@ import os
 import json
 import datetime
 
-from config.DBs import get_db
+from config.DBs import get_db, lazy_db
 from config.utils import get_time
 from functools import wraps
 
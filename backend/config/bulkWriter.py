@@ -0,0 +1,53 @@
+import logging
+import os
+from pymongo.errors import BulkWriteError
+
+# Number of buffered operations sent to Mongo in one bulk_write call
+BULK_WRITE_BATCH_SIZE = int(os.getenv('BULK_WRITE_BATCH_SIZE', 500))
+
+
+class BulkWriter:
+    """Buffers write operations and flushes them as unordered bulk_write batches.
+
+    A document that fails does not abort its batch or the run: the error is
+    recorded in errors together with the ref passed to add().
+    """
+
+    def __init__(self, collection, batch_size=None):
+        self.collection = collection
+        self.batch_size = batch_size or BULK_WRITE_BATCH_SIZE
+        self.operations = []
+        self.refs = []
+        self.errors = []
+        self.written = 0
+
+    def add(self, operation, ref=None):
+        self.operations.append(operation)
+        self.refs.append(ref)
+        if len(self.operations) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.operations:
+            return
+        operations, refs = self.operations, self.refs
+        self.operations, self.refs = [], []
+
+        try:
+            self.collection.bulk_write(operations, ordered=False)
+            self.written += len(operations)
+        except BulkWriteError as e:
+            write_errors = e.details.get('writeErrors', [])
+            for error in write_errors:
+                self.errors.append({'ref': refs[error['index']], 'error': error.get('errmsg', 'Write failed')})
+            self.written += len(operations) - len(write_errors)
+            logging.error(f'{len(write_errors)} of {len(operations)} writes to {self.collection.name} failed')
+        except Exception as e:
+            self.errors.extend({'ref': ref, 'error': str(e)} for ref in refs)
+            logging.error(f'Bulk write of {len(operations)} operations to {self.collection.name} failed: {e}')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
@@ -0,0 +1,271 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import Counter, defaultdict
+from itertools import chain
+import numpy as np
+from pymongo import UpdateOne
+from config.bulkWriter import BulkWriter
+from config.embeddingStore import EmbeddingStore
+from config.embeddings import EMBEDDING_MODEL_ID, get_bert_embeddings
+from config.preprocessing import missing_preprocessing_resources, preprocess_many
+
+# Two descriptions whose 64-bit SimHash differ in at most this many bits are near-duplicates.
+# One changed word in a 30-word description moves ~4-8 bits; unrelated descriptions differ by ~32.
+DEDUP_MAX_DISTANCE = int(os.getenv('DEDUP_MAX_DISTANCE', 7))
+# Descriptions shorter than this (after preprocessing) are too generic to compare
+DEDUP_MIN_TOKENS = int(os.getenv('DEDUP_MIN_TOKENS', 5))
+# When both tickets already have an embedding, a SimHash match also needs this cosine similarity
+DEDUP_EMBEDDING_THRESHOLD = float(os.getenv('DEDUP_EMBEDDING_THRESHOLD', 0.95))
+
+SIMHASH_BITS = 64
+_M1, _M2, _M4, _H01 = (np.uint64(mask) for mask in (
+    0x5555555555555555, 0x3333333333333333, 0x0F0F0F0F0F0F0F0F, 0x0101010101010101
+))
+
+
+def popcount(values):
+    """Set bits of every uint64 in values (SWAR, as numpy 1.x has no bitwise_count)."""
+    values = values - ((values >> np.uint64(1)) & _M1)
+    values = (values & _M2) + ((values >> np.uint64(2)) & _M2)
+    values = (values + (values >> np.uint64(4))) & _M4
+    return (values * _H01) >> np.uint64(56)
+
+
+def simhash(tokens):
+    """64-bit SimHash of a token list, weighted by token counts. None for no tokens."""
+    features = Counter(tokens)
+    if not features:
+        return None
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+         for feature in features),
+        dtype=np.uint64, count=len(features)
+    )
+    weights = np.fromiter(features.values(), dtype=np.int64, count=len(features))
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder='little').astype(np.int64)
+    totals = weights @ (2 * bits - 1)
+    return int(np.packbits(totals > 0, bitorder='little').view('<u8')[0])
+
+
+def to_mongo_int(fingerprint):
+    """Mongo stores signed 64-bit integers."""
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+
+def from_mongo_int(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+def ticket_ref(doc):
+    """The Jira key a ticket is known by (Jira sync stores it as ID, /jira/bulk as Key)."""
+    return doc.get('ID') or doc.get('Key') or str(doc.get('_id'))
+
+
+class DuplicateDetector:
+    """In-memory SimHash index of the ticket backlog.
+
+    Fingerprints are split into DEDUP_MAX_DISTANCE + 1 bands. Two fingerprints
+    within that Hamming distance must agree exactly on at least one band, so a
+    lookup only computes the distance to the tickets sharing a band with it,
+    in one vectorized pass, instead of scanning the whole backlog.
+    """
+
+    def __init__(self, max_distance=None):
+        self.max_distance = DEDUP_MAX_DISTANCE if max_distance is None else max_distance
+        band_count = self.max_distance + 1
+        width = SIMHASH_BITS // band_count
+        self.bands = [
+            (band * width, SIMHASH_BITS if band == band_count - 1 else (band + 1) * width)
+            for band in range(band_count)
+        ]
+        self.fingerprints = np.empty(1024, dtype=np.uint64)
+        self.refs = []
+        self.row_by_ref = {}
+        self.buckets = defaultdict(list)
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.row_by_ref)
+
+    def _band_keys(self, fingerprint):
+        return [(start, (fingerprint >> start) & ((1 << (end - start)) - 1)) for start, end in self.bands]
+
+    def add(self, ref, fingerprint):
+        with self.lock:
+            row = self.row_by_ref.pop(ref, None)
+            if row is not None:
+                for band_key in self._band_keys(int(self.fingerprints[row])):
+                    self.buckets[band_key].remove(row)
+            if fingerprint is None:
+                return
+            row = len(self.refs)
+            if row == len(self.fingerprints):
+                self.fingerprints = np.concatenate([self.fingerprints, np.empty_like(self.fingerprints)])
+            self.fingerprints[row] = fingerprint
+            self.refs.append(ref)
+            self.row_by_ref[ref] = row
+            for band_key in self._band_keys(fingerprint):
+                self.buckets[band_key].append(row)
+
+    def candidates(self, ref, fingerprint):
+        """(ref, distance) of every indexed ticket within max_distance bits, closest first."""
+        with self.lock:
+            # A row sharing several bands shows up several times; it is deduplicated below
+            rows = np.fromiter(
+                chain.from_iterable(self.buckets.get(band_key, ()) for band_key in self._band_keys(fingerprint)),
+                dtype=np.int64
+            )
+            if not len(rows):
+                return []
+            distances = popcount(self.fingerprints[rows] ^ np.uint64(fingerprint))
+            close = rows[distances <= self.max_distance]
+            matches = {}
+            for row, distance in zip(close.tolist(), distances[distances <= self.max_distance].tolist()):
+                if self.refs[row] != ref:
+                    matches[self.refs[row]] = distance
+        return sorted(matches.items(), key=lambda match: match[1])
+
+    def load(self, db):
+        """Index every ticket, fingerprinting (and storing SimHash on) tickets ingested before dedup existed."""
+        missing = []
+        for doc in db.jira_tickets.find({}, {'ID': 1, 'Key': 1, 'SimHash': 1, 'Description': 1}):
+            if 'SimHash' in doc:
+                self.add(ticket_ref(doc), None if doc['SimHash'] is None else from_mongo_int(doc['SimHash']))
+            else:
+                missing.append(doc)
+        if missing and missing_preprocessing_resources():
+            # Fingerprints stored now would differ from later ones; they are backfilled on a later load
+            logging.warning(f'Not fingerprinting {len(missing)} tickets until the NLTK data is available')
+            missing = []
+        if missing:
+            fingerprints = fingerprint_descriptions([doc.get('Description') for doc in missing])
+            for doc, (fingerprint, _) in zip(missing, fingerprints):
+                self.add(ticket_ref(doc), fingerprint)
+            with BulkWriter(db.jira_tickets) as writer:
+                for doc, (fingerprint, _) in zip(missing, fingerprints):
+                    value = None if fingerprint is None else to_mongo_int(fingerprint)
+                    writer.add(UpdateOne({'_id': doc['_id']}, {'$set': {'SimHash': value}}), ref=doc['_id'])
+        logging.info(f'Duplicate detector indexed {len(self)} tickets ({len(missing)} fingerprinted)')
+
+
+def fingerprint_descriptions(descriptions):
+    """(SimHash or None, preprocessed text) per description."""
+    results = []
+    for text in preprocess_many(description or '' for description in descriptions):
+        tokens = text.split()
+        results.append((simhash(tokens) if len(tokens) >= DEDUP_MIN_TOKENS else None, text))
+    return results
+
+
+def _embeddings_disagree(db, pairs, batch_texts):
+    """For (new text, matched ref) pairs, True where the two descriptions' embeddings are not close.
+
+    Only SimHash candidates get here, a few per batch, so descriptions
+    without a stored embedding (every newly ingested ticket) are embedded
+    now; the vectors are stored and later reused by classification.
+    batch_texts maps the refs of the batch being checked to their
+    preprocessed description, as those tickets are not in the database yet.
+    """
+    refs = list({ref for _, ref in pairs if ref not in batch_texts})
+    matched_texts = dict(batch_texts)
+    if refs:
+        matched_docs = list(db.jira_tickets.find(
+            {'$or': [{'ID': {'$in': refs}}, {'Key': {'$in': refs}}]}, {'ID': 1, 'Key': 1, 'Description': 1}
+        ))
+        for doc, (_, text) in zip(matched_docs, fingerprint_descriptions([doc.get('Description') for doc in matched_docs])):
+            matched_texts.setdefault(ticket_ref(doc), text)
+
+    texts = list({text for pair in pairs for text in (pair[0], matched_texts.get(pair[1], '')) if text.strip()})
+    try:
+        keys, vectors = EmbeddingStore(db, EMBEDDING_MODEL_ID).embed(texts, get_bert_embeddings)
+    except Exception as e:
+        logging.warning(f'Could not embed duplicate candidates, keeping the SimHash matches: {e}')
+        return [False] * len(pairs)
+    vector_by_text = dict(zip(texts, vectors))
+
+    disagree = []
+    for text, ref in pairs:
+        first, second = vector_by_text.get(text), vector_by_text.get(matched_texts.get(ref))
+        if first is None or second is None:
+            disagree.append(False)
+            continue
+        cosine = float(first @ second / max(np.linalg.norm(first) * np.linalg.norm(second), 1e-12))
+        disagree.append(cosine < DEDUP_EMBEDDING_THRESHOLD)
+    return disagree
+
+
+def flag_duplicates(db, docs, check=True):
+    """Set SimHash and DuplicateOf (the Jira key of the closest matching ticket, or None) on docs in place.
+
+    docs are checked in order against the backlog and against each other.
+    They are not added to the detector: once they are written, pass them to
+    remember_fingerprints, so a failed write leaves no ticket to be flagged
+    against. With check=False (tickets that already existed and were only
+    updated) just SimHash is refreshed. While preprocessing lacks NLTK data
+    nothing is checked and SimHash is removed from docs, leaving it to the
+    backfill in DuplicateDetector.load. Returns the number of docs flagged.
+    """
+    if missing_preprocessing_resources():
+        for doc in docs:
+            doc.pop('SimHash', None)
+        return 0
+    detector = get_duplicate_detector(db)
+    batch = DuplicateDetector(detector.max_distance)
+    fingerprints = fingerprint_descriptions([doc.get('Description') for doc in docs])
+
+    matches = {}
+    for position, (doc, (fingerprint, _)) in enumerate(zip(docs, fingerprints)):
+        ref = ticket_ref(doc)
+        if check and fingerprint is not None:
+            candidates = sorted(
+                detector.candidates(ref, fingerprint) + batch.candidates(ref, fingerprint),
+                key=lambda candidate: candidate[1]
+            )
+            if candidates:
+                matches[position] = candidates[0][0]
+        batch.add(ref, fingerprint)
+        doc['SimHash'] = None if fingerprint is None else to_mongo_int(fingerprint)
+    if not check:
+        return 0
+
+    # Second pass: drop SimHash matches that embeddings say are different tickets
+    if matches:
+        positions = list(matches)
+        batch_texts = {ticket_ref(doc): text for doc, (_, text) in zip(docs, fingerprints)}
+        disagree = _embeddings_disagree(
+            db, [(fingerprints[position][1], matches[position]) for position in positions], batch_texts
+        )
+        for position, rejected in zip(positions, disagree):
+            if rejected:
+                del matches[position]
+
+    for position, doc in enumerate(docs):
+        doc['DuplicateOf'] = matches.get(position)
+    return len(matches)
+
+
+def remember_fingerprints(db, docs):
+    """Index the SimHash flag_duplicates set on docs, once they have been written."""
+    docs = [doc for doc in docs if 'SimHash' in doc]
+    if not docs:
+        return
+    detector = get_duplicate_detector(db)
+    for doc in docs:
+        detector.add(ticket_ref(doc), None if doc.get('SimHash') is None else from_mongo_int(doc['SimHash']))
+
+
+_detector = None
+_detector_lock = threading.Lock()
+
+
+def get_duplicate_detector(db):
+    """Process-wide DuplicateDetector, loaded from jira_tickets on first use."""
+    global _detector
+    with _detector_lock:
+        if _detector is None:
+            detector = DuplicateDetector()
+            detector.load(db)
+            _detector = detector
+        return _detector
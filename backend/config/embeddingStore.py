@@ -0,0 +1,70 @@
+import hashlib
+import numpy as np
+from bson.binary import Binary
+from pymongo import UpdateOne
+
+# Keep $in queries and bulk writes well under Mongo's 16MB document limits
+QUERY_CHUNK_SIZE = 1000
+
+
+class EmbeddingStore:
+    """Text embeddings persisted in Mongo as raw float32 bytes.
+
+    Documents are keyed by a hash of the model id and the (preprocessed)
+    text, so a vector is reused until either the text or the model changes.
+    """
+
+    def __init__(self, db, model_id, collection='ticket_embeddings'):
+        self.collection = db[collection]
+        self.model_id = model_id
+
+    def key_for(self, text):
+        return hashlib.sha256(f'{self.model_id}\n{text}'.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys):
+        vectors = {}
+        unique_keys = list(dict.fromkeys(keys))
+        for start in range(0, len(unique_keys), QUERY_CHUNK_SIZE):
+            chunk = unique_keys[start:start + QUERY_CHUNK_SIZE]
+            for doc in self.collection.find({'_id': {'$in': chunk}}, {'vector': 1}):
+                vectors[doc['_id']] = np.frombuffer(doc['vector'], dtype=np.float32)
+        return vectors
+
+    def dimension(self):
+        """Width of the vectors stored for this model, or None when there are none yet."""
+        doc = self.collection.find_one({'model': self.model_id}, {'dim': 1})
+        return doc.get('dim') if doc else None
+
+    def put_many(self, vectors_by_key):
+        operations = [
+            UpdateOne(
+                {'_id': key},
+                {'$set': {
+                    'model': self.model_id,
+                    'dim': int(vector.shape[0]),
+                    'vector': Binary(np.asarray(vector, dtype=np.float32).tobytes()),
+                }},
+                upsert=True
+            )
+            for key, vector in vectors_by_key.items()
+        ]
+        for start in range(0, len(operations), QUERY_CHUNK_SIZE):
+            self.collection.bulk_write(operations[start:start + QUERY_CHUNK_SIZE], ordered=False)
+
+    def embed(self, texts, embed_fn):
+        """Return (keys, vectors) for texts, calling embed_fn only for texts not stored yet."""
+        keys = [self.key_for(text) for text in texts]
+        vectors = self.get_many(keys)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors and key not in missing:
+                missing[key] = text
+        if missing:
+            computed = dict(zip(missing, embed_fn(list(missing.values()))))
+            self.put_many(computed)
+            vectors.update(computed)
+
+        if not keys:
+            return keys, np.empty((0, 0), dtype=np.float32)
+        return keys, np.vstack([vectors[key] for key in keys])
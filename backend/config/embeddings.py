@@ -0,0 +1,39 @@
+import os
+import numpy as np
+from config.modelRegistry import BERT_MODEL_NAME, get_bert
+
+# Number of texts sent through BERT in a single forward pass
+EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', 32))
+
+# Identifies the vectors produced by get_bert_embeddings; bump it when the pooling changes
+EMBEDDING_MODEL_ID = f'{BERT_MODEL_NAME}:masked-mean'
+
+def get_bert_embeddings(texts, batch_size=None):
+    """Embed texts with BERT in length-sorted mini-batches.
+
+    Texts are sorted by token count so each batch is only padded to its own
+    longest member, and padding tokens are masked out of the mean pooling so
+    a text gets the same vector whatever batch it lands in.
+    """
+    import torch
+
+    batch_size = batch_size or EMBEDDING_BATCH_SIZE
+    tokenizer, model = get_bert(BERT_MODEL_NAME)
+    hidden_size = model.config.hidden_size
+    if not texts:
+        return np.empty((0, hidden_size), dtype=np.float32)
+
+    encodings = tokenizer(texts, truncation=True)['input_ids']
+    order = sorted(range(len(texts)), key=lambda i: len(encodings[i]))
+    embeddings = np.empty((len(texts), hidden_size), dtype=np.float32)
+
+    for start in range(0, len(order), batch_size):
+        batch_indices = order[start:start + batch_size]
+        batch = tokenizer.pad({'input_ids': [encodings[i] for i in batch_indices]}, return_tensors='pt')
+        with torch.no_grad():
+            outputs = model(**batch)
+        mask = batch['attention_mask'].unsqueeze(-1).to(outputs.last_hidden_state.dtype)
+        pooled = (outputs.last_hidden_state * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+        embeddings[batch_indices] = pooled.numpy()
+
+    return embeddings
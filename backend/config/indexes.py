@@ -0,0 +1,174 @@
+import logging
+import os
+import threading
+import click
+from flask.cli import AppGroup
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure, PyMongoError
+from config.DBs import get_db
+
+# Create the registered indexes in the background when the app starts (set to 0 to use the CLI only)
+ENSURE_INDEXES_AT_STARTUP = os.getenv('ENSURE_INDEXES_AT_STARTUP', '1') == '1'
+
+# Every index the application relies on, by collection. Keys are (field, direction) pairs;
+# the other entries are create_index options. Indexes are named after their keys the way
+# MongoDB does by default, so an index created by hand with the same keys is recognised.
+# Unique indexes are sparse where older documents may lack the field.
+INDEXES = {
+    'jira_tickets': [
+        # Jira sync diff and dedup second pass
+        {'keys': [('ID', ASCENDING)], 'unique': True, 'sparse': True},
+        # Tickets stored through JiraTicket.to_dict carry their Jira key as Key
+        {'keys': [('Key', ASCENDING)], 'sparse': True},
+        # GET /jira/ filters, paged in _id order; the Project prefix also serves assignProjectByName
+        {'keys': [('Project', ASCENDING), ('_id', ASCENDING)]},
+        {'keys': [('Status', ASCENDING), ('_id', ASCENDING)]},
+        {'keys': [('Type', ASCENDING), ('_id', ASCENDING)]},
+        {'keys': [('Resolution', ASCENDING), ('_id', ASCENDING)]},
+        # Similar-ticket index sync
+        {'keys': [('EmbeddingKey', ASCENDING)], 'sparse': True},
+    ],
+    'matched_issues': [
+        # Classification upsert
+        {'keys': [('jira_id', ASCENDING)], 'unique': True, 'sparse': True},
+        # answer_question
+        {'keys': [('issue.ID', ASCENDING)], 'sparse': True},
+        # Best match listing filters, paged in _id order: path (and no-match), score and project
+        {'keys': [('best_matches.0.path', ASCENDING), ('_id', ASCENDING)]},
+        {'keys': [('best_matches.0.similarity_score', ASCENDING), ('_id', ASCENDING)]},
+        {'keys': [('issue.Project', ASCENDING), ('_id', ASCENDING)]},
+        # similar_to, which looks at every best match and not only the first
+        {'keys': [('best_matches.path', ASCENDING)]},
+    ],
+    'skipped_issues': [
+        # Incremental classification watermarks of tickets without a usable description
+        {'keys': [('jira_id', ASCENDING)], 'unique': True, 'sparse': True},
+    ],
+    'accounts': [
+        # Login, registration and account updates
+        {'keys': [('username', ASCENDING)], 'unique': True, 'sparse': True},
+    ],
+    'mailboxes': [
+        {'keys': [('email', ASCENDING)], 'unique': True, 'sparse': True},
+    ],
+    'senders': [
+        {'keys': [('mailbox', ASCENDING)]},
+    ],
+    'fields': [
+        {'keys': [('topic', ASCENDING)]},
+    ],
+    'topics': [
+        {'keys': [('state', ASCENDING)]},
+    ],
+    'leaf_path_matrices': [
+        {'keys': [('tree_version', ASCENDING), ('model', ASCENDING)]},
+    ],
+}
+
+
+def index_name(keys):
+    return '_'.join(f'{field}_{direction}' for field, direction in keys)
+
+
+def index_models(specs):
+    return [
+        IndexModel(spec['keys'], name=index_name(spec['keys']), **{k: v for k, v in spec.items() if k != 'keys'})
+        for spec in specs
+    ]
+
+
+def ensure_indexes(db, registry=None):
+    """Create every registered index that does not exist yet.
+
+    Indexes are created one at a time so that one failure (typically a unique
+    index over existing duplicates, or an index with the same name but other
+    options) does not prevent the others. Returns {'created': [...], 'failed': {name: error}}.
+    """
+    registry = registry or INDEXES
+    report = {'created': [], 'failed': {}}
+    for collection_name, specs in registry.items():
+        collection = db[collection_name]
+        existing = set(collection.index_information())
+        for model in index_models(specs):
+            name = model.document['name']
+            if name in existing:
+                continue
+            try:
+                collection.create_indexes([model])
+                report['created'].append(f'{collection_name}.{name}')
+            except PyMongoError as e:
+                logging.error(f'Could not create index {collection_name}.{name}: {e}')
+                report['failed'][f'{collection_name}.{name}'] = str(e)
+    return report
+
+
+def index_report(db, registry=None):
+    """Registered indexes that are missing, indexes nobody registered, and indexes never used.
+
+    Usage comes from $indexStats and counts operations since the server last
+    started; it is None when the server does not allow $indexStats.
+    """
+    registry = registry or INDEXES
+    report = {}
+    for collection_name in sorted(set(registry) | set(db.list_collection_names())):
+        registered = {model.document['name'] for model in index_models(registry.get(collection_name, []))}
+        existing = set(db[collection_name].index_information()) - {'_id_'}
+        try:
+            usage = {
+                stats['name']: stats['accesses']['ops']
+                for stats in db[collection_name].aggregate([{'$indexStats': {}}])
+                if stats['name'] != '_id_'
+            }
+        except (OperationFailure, NotImplementedError):
+            usage = None
+        entry = {
+            'missing': sorted(registered - existing),
+            'unregistered': sorted(existing - registered),
+            'unused': sorted(name for name, ops in usage.items() if ops == 0) if usage is not None else None,
+        }
+        if any(entry.values()):
+            report[collection_name] = entry
+    return report
+
+
+def start_index_bootstrap():
+    """Ensure the registered indexes on a daemon thread, so startup does not wait for index builds."""
+    if not ENSURE_INDEXES_AT_STARTUP:
+        return
+
+    def run():
+        try:
+            report = ensure_indexes(get_db())
+            if report['created']:
+                logging.info(f"Created indexes: {', '.join(report['created'])}")
+        except PyMongoError as e:
+            logging.error(f'Index bootstrap failed: {e}')
+
+    threading.Thread(target=run, name='index-bootstrap', daemon=True).start()
+
+
+indexes_cli = AppGroup('indexes', help='Manage the MongoDB indexes registered in config/indexes.py.')
+
+
+@indexes_cli.command('ensure')
+def ensure_indexes_command():
+    """Create the registered indexes that are missing."""
+    report = ensure_indexes(get_db())
+    for name in report['created']:
+        click.echo(f'created {name}')
+    for name, error in report['failed'].items():
+        click.echo(f'FAILED  {name}: {error}', err=True)
+    if not report['created'] and not report['failed']:
+        click.echo('All registered indexes exist.')
+
+
+@indexes_cli.command('report')
+def index_report_command():
+    """List missing, unregistered and unused indexes."""
+    report = index_report(get_db())
+    if not report:
+        click.echo('Indexes match the registry and are all in use.')
+    for collection_name, entry in report.items():
+        for kind, names in entry.items():
+            for name in names or []:
+                click.echo(f'{kind:<13} {collection_name}.{name}')
@@ -0,0 +1,151 @@
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from config.utils import get_time
+
+# Finished jobs kept in memory for status polling before the oldest are dropped
+MAX_FINISHED_JOBS = 50
+# Finished jobs that keep their results; older ones only keep their status and counts
+MAX_FINISHED_JOBS_WITH_RESULTS = 5
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """State of a background job, shared between the worker thread and the status endpoint."""
+
+    def __init__(self, name, key=None):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.key = name if key is None else key
+        self.status = 'queued'
+        self.done = 0
+        self.total = 0
+        self.results = []
+        self.result_count = 0
+        self.results_dropped = False
+        self.errors = []
+        self.error = None
+        self.created_at = get_time()
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return self.status in ('succeeded', 'failed', 'cancelled')
+
+    def set_progress(self, done, total):
+        with self.lock:
+            self.done, self.total = done, total
+
+    def add_result(self, result):
+        with self.lock:
+            self.results.append(result)
+            self.result_count += 1
+
+    def drop_results(self):
+        with self.lock:
+            if self.results:
+                self.results = []
+                self.results_dropped = True
+
+    def add_errors(self, errors):
+        with self.lock:
+            self.errors.extend(errors)
+
+    def finish(self, status, error=None):
+        with self.lock:
+            self.status, self.error, self.finished_at = status, error, get_time()
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+
+    def to_dict(self, offset=0):
+        with self.lock:
+            return {
+                'job_id': self.id,
+                'name': self.name,
+                'status': self.status,
+                'progress': {
+                    'done': self.done,
+                    'total': self.total,
+                    'percentage': int(self.done / self.total * 100) if self.total else (100 if self.finished else 0),
+                },
+                'results': self.results[offset:],
+                'result_count': self.result_count,
+                'results_dropped': self.results_dropped,
+                'errors': list(self.errors),
+                'error': self.error,
+                'created_at': self.created_at,
+                'finished_at': self.finished_at,
+            }
+
+
+class JobRunner:
+    """Runs long jobs on a small local thread pool so web workers return immediately.
+
+    Jobs live in the memory of the process that started them: polling or
+    cancelling one only works against that same process.
+    """
+
+    def __init__(self, max_workers=1):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, name, fn, key=None):
+        """Queue fn(job) and return its Job.
+
+        A job with the same key (the name by default) that has not finished is
+        returned instead, so key should include whatever parameters change the
+        work fn does.
+        """
+        with self.lock:
+            job = Job(name, key)
+            for other in self.jobs.values():
+                if other.key == job.key and not other.finished:
+                    return other
+            self.jobs[job.id] = job
+            self._prune()
+        self.executor.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job and not job.finished:
+            job.cancel_event.set()
+        return job
+
+    def _run(self, job, fn):
+        if job.cancel_event.is_set():
+            job.finish('cancelled')
+            return
+        with job.lock:
+            job.status = 'running'
+        try:
+            fn(job)
+            job.finish('succeeded')
+        except JobCancelled:
+            job.finish('cancelled')
+        except Exception as e:
+            logging.exception(f'Job {job.name} ({job.id}) failed')
+            job.finish('failed', str(e))
+        with self.lock:
+            self._prune()
+
+    def _prune(self):
+        finished = [job for job in self.jobs.values() if job.finished]
+        excess = max(0, len(finished) - MAX_FINISHED_JOBS)
+        for job in finished[:excess]:
+            del self.jobs[job.id]
+        kept = finished[excess:]
+        for job in kept[:max(0, len(kept) - MAX_FINISHED_JOBS_WITH_RESULTS)]:
+            job.drop_results()
@@ -0,0 +1,147 @@
+import logging
+import os
+import threading
+import time
+
+# Model ids per role. Pointing several roles at the same id makes them share one loaded copy.
+BERT_MODEL_NAME = os.getenv('BERT_MODEL', 'bert-base-uncased')
+NER_MODEL = os.getenv('NER_MODEL', 'dslim/bert-large-NER')
+CLASSIFICATION_QA_MODEL = os.getenv('CLASSIFICATION_QA_MODEL', 'bert-base-multilingual-cased')
+INGEST_QA_MODEL = os.getenv('INGEST_QA_MODEL', 'distilbert/distilbert-base-cased-distilled-squad')
+ANSWER_QA_MODEL = os.getenv('ANSWER_QA_MODEL', 'bert-large-uncased-whole-word-masking-finetuned-squad')
+
+# Number of (question, context) pairs or NER inputs per pipeline forward pass
+SUMMARY_BATCH_SIZE = int(os.getenv('SUMMARY_BATCH_SIZE', 16))
+
+# Load every configured model in a background thread at startup (set to 0 to load on first use only)
+WARM_UP_MODELS = os.getenv('WARM_UP_MODELS', '1') == '1'
+
+_models = {}
+_stats = {}
+# Guards _models, _stats and _load_locks; never held while a model loads
+_lock = threading.Lock()
+_load_locks = {}
+_warm_up = {'status': 'idle', 'failed': {}, 'started_at': None, 'finished_at': None}
+_warm_up_lock = threading.Lock()
+
+
+def _parameter_bytes(model):
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+
+def _load(key, loader, model):
+    """Load a model once per process; concurrent callers of the same model wait for the first load.
+
+    Loaded models are returned without taking any lock, and a load only
+    holds the lock of its own key, so a slow load (warm-up of a large QA
+    model) does not block callers of models that are already loaded.
+    """
+    loaded = _models.get(key)
+    if loaded is not None:
+        return loaded
+    with _lock:
+        key_lock = _load_locks.setdefault(key, threading.Lock())
+    with key_lock:
+        if key not in _models:
+            started = time.time()
+            logging.info(f'Loading model {key}...')
+            loaded = loader()
+            stats = {
+                'task': key[0],
+                'model': key[1],
+                'load_seconds': round(time.time() - started, 2),
+                'parameter_bytes': _parameter_bytes(model(loaded)),
+            }
+            with _lock:
+                _stats[key] = stats
+                _models[key] = loaded
+        return _models[key]
+
+
+def get_pipeline(task, model_id):
+    """Shared Hugging Face pipeline for (task, model_id)."""
+    def loader():
+        from transformers import pipeline
+        return pipeline(task, model=model_id)
+    return _load((task, model_id), loader, lambda pipe: pipe.model)
+
+
+def run_qa(model_id, pairs):
+    """Answers of the question-answering pipeline of model_id for (question, context) pairs, in batches."""
+    questions, contexts = zip(*pairs)
+    qa_pipeline = get_pipeline("question-answering", model_id)
+    answers = qa_pipeline(question=list(questions), context=list(contexts), batch_size=SUMMARY_BATCH_SIZE)
+    # The pipeline returns a bare dict when given a single pair
+    if isinstance(answers, dict):
+        answers = [answers]
+    return [answer['answer'] for answer in answers]
+
+
+def run_ner(model_id, texts):
+    """Entities found by the NER pipeline of model_id, one list per text, in batches."""
+    return get_pipeline("ner", model_id)(list(texts), batch_size=SUMMARY_BATCH_SIZE)
+
+
+def get_bert(model_id=BERT_MODEL_NAME):
+    """Shared (tokenizer, BertModel) pair for model_id."""
+    def loader():
+        from transformers import BertTokenizer, BertModel
+        return BertTokenizer.from_pretrained(model_id), BertModel.from_pretrained(model_id)
+    return _load(('feature-extraction', model_id), loader, lambda loaded: loaded[1])
+
+
+def model_stats():
+    """Loaded models with their load time and parameter memory in MB."""
+    with _lock:
+        return [
+            {**stats, 'parameter_mb': round(stats['parameter_bytes'] / 1024 ** 2, 1)}
+            for stats in _stats.values()
+        ]
+
+
+def _warm_up_models():
+    """Loader per (task, model id) for every model role; roles sharing a model id share an entry."""
+    models = {('feature-extraction', BERT_MODEL_NAME): lambda: get_bert(BERT_MODEL_NAME)}
+    models[('ner', NER_MODEL)] = lambda: get_pipeline('ner', NER_MODEL)
+    for model_id in (CLASSIFICATION_QA_MODEL, INGEST_QA_MODEL, ANSWER_QA_MODEL):
+        models[('question-answering', model_id)] = lambda model_id=model_id: get_pipeline('question-answering', model_id)
+    return models
+
+
+def _run_warm_up():
+    for (task, model_id), loader in _warm_up_models().items():
+        try:
+            loader()
+        except Exception as e:
+            logging.exception(f'Warm-up of {task}:{model_id} failed')
+            _warm_up['failed'][f'{task}:{model_id}'] = str(e)
+    _warm_up['status'] = 'failed' if _warm_up['failed'] else 'ready'
+    _warm_up['finished_at'] = time.time()
+
+
+def start_warm_up():
+    """Load the configured models on a daemon thread so the server can start listening right away."""
+    with _warm_up_lock:
+        if _warm_up['status'] != 'idle':
+            return
+        if not WARM_UP_MODELS:
+            _warm_up['status'] = 'disabled'
+            return
+        _warm_up['status'] = 'warming'
+        _warm_up['started_at'] = time.time()
+    threading.Thread(target=_run_warm_up, name='model-warm-up', daemon=True).start()
+
+
+def readiness():
+    """Warm-up state. Models are ready once warm-up has loaded them all, or on demand when it is disabled."""
+    expected = [f'{task}:{model_id}' for task, model_id in _warm_up_models()]
+    with _lock:
+        loaded = [f'{task}:{model_id}' for task, model_id in _models]
+    return {
+        'ready': _warm_up['status'] in ('ready', 'disabled'),
+        'status': _warm_up['status'],
+        'loaded': [name for name in expected if name in loaded],
+        'pending': [name for name in expected if name not in loaded and name not in _warm_up['failed']],
+        'failed': dict(_warm_up['failed']),
+    }
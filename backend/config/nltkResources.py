@@ -0,0 +1,86 @@
+import logging
+import os
+import threading
+import nltk
+
+# NLTK data needed by the preprocessing, by download id and path under the NLTK data directories
+NLTK_RESOURCES = {
+    'punkt': 'tokenizers/punkt',
+    'stopwords': 'corpora/stopwords',
+}
+STOPWORD_LANGUAGES = ('english', 'french')
+
+# Fetch missing NLTK data in the background at startup (set to 0 on air-gapped nodes)
+NLTK_DOWNLOAD = os.getenv('NLTK_DOWNLOAD', '1') == '1'
+
+_stop_words = None
+_found = {}
+_warned = set()
+_lock = threading.Lock()
+_download_started = False
+
+
+def has_resource(name):
+    """True when the resource is in one of the local NLTK data directories.
+
+    The answer is remembered so the data path is searched once, not on every
+    preprocessed text; download_missing() refreshes it.
+    """
+    if name not in _found:
+        try:
+            nltk.data.find(NLTK_RESOURCES[name])
+            _found[name] = True
+        except LookupError:
+            _found[name] = False
+    return _found[name]
+
+
+def warn_missing(name, fallback):
+    """Log once per process that preprocessing runs without a resource, and how it falls back."""
+    if name not in _warned:
+        _warned.add(name)
+        logging.warning(f'NLTK resource {name} is not available yet, {fallback}. '
+                        f'Results computed meanwhile are not stored.')
+
+
+def missing_resources():
+    return [name for name in NLTK_RESOURCES if not has_resource(name)]
+
+
+def download_missing():
+    """Download the resources that are not available locally. Blocks, so only call it off the request path."""
+    for name in missing_resources():
+        try:
+            if not nltk.download(name, quiet=True):
+                logging.warning(f'NLTK resource {name} could not be downloaded')
+        except Exception as e:
+            logging.warning(f'NLTK resource {name} could not be downloaded: {e}')
+        _found.pop(name, None)
+
+
+def start_nltk_bootstrap():
+    """Download missing NLTK data on a daemon thread; does nothing when everything is local."""
+    global _download_started
+    with _lock:
+        if _download_started or not NLTK_DOWNLOAD or not missing_resources():
+            return
+        _download_started = True
+    threading.Thread(target=download_missing, name='nltk-bootstrap', daemon=True).start()
+
+
+def get_stop_words():
+    """English and French stopwords as a frozenset, built once per process.
+
+    While the stopwords corpus is missing an empty set is returned, and the
+    set is built on the first call after it becomes available.
+    """
+    global _stop_words
+    if _stop_words is None:
+        with _lock:
+            if _stop_words is None:
+                if not has_resource('stopwords'):
+                    warn_missing('stopwords', 'stopwords are kept')
+                    return frozenset()
+                from nltk.corpus import stopwords
+                _stop_words = frozenset(word for language in STOPWORD_LANGUAGES for word in stopwords.words(language))
+    return _stop_words
@@ -0,0 +1,46 @@
+import os
+from bson.objectid import ObjectId
+
+# Page size of the cursor-paginated listings when no limit is given, and the largest one allowed
+PAGE_SIZE = int(os.getenv('PAGE_SIZE', 50))
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 500))
+
+
+def fields_projection(fields, default):
+    """Inclusion projection for a comma separated ?fields= list, or default when it is empty.
+
+    Raises ValueError when a field is also listed with one of its subfields
+    (e.g. issue,issue.ID), which MongoDB rejects as a path collision.
+    """
+    names = {name.strip() for name in (fields or '').split(',') if name.strip() and not name.strip().startswith('$')}
+    if not names:
+        return default
+    for name in names:
+        parts = name.split('.')
+        for parent in ('.'.join(parts[:end]) for end in range(1, len(parts))):
+            if parent in names:
+                raise ValueError(f'fields {parent} and {name} overlap')
+    return {name: 1 for name in sorted(names)}
+
+
+def find_page(collection, query, projection=None, cursor=None, limit=None):
+    """One page of documents in _id order and the cursor of the next page (None on the last one).
+
+    cursor is the _id of the last document of the previous page, so a page
+    costs one index seek however deep into the collection it is, and documents
+    inserted or deleted meanwhile never shift the pages. Raises ValueError for
+    a cursor that is not an ObjectId.
+    """
+    limit = min(max(limit or PAGE_SIZE, 1), MAX_PAGE_SIZE)
+    if cursor:
+        if not ObjectId.is_valid(cursor):
+            raise ValueError(f'invalid cursor {cursor}')
+        query = {**query, '_id': {'$gt': ObjectId(cursor)}}
+
+    # One extra document tells whether there is a next page without counting
+    docs = list(collection.find(query, projection).sort('_id', 1).limit(limit + 1))
+    next_cursor = str(docs[limit - 1]['_id']) if len(docs) > limit else None
+    docs = docs[:limit]
+    for doc in docs:
+        doc['_id'] = str(doc['_id'])
+    return docs, next_cursor
@@ -0,0 +1,82 @@
+import atexit
+import multiprocessing
+import os
+import re
+import string
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from config.nltkResources import get_stop_words, has_resource, warn_missing
+
+# 'punkt' (NLTK word_tokenize) or 'regex' (a single \w+ scan, much faster on long descriptions).
+# Both give the same tokens on most ticket text once punctuation is stripped.
+PREPROCESS_TOKENIZER = os.getenv('PREPROCESS_TOKENIZER', 'punkt')
+
+# Batches at least this long are fanned out over a process pool
+PREPROCESS_PARALLEL_MIN = int(os.getenv('PREPROCESS_PARALLEL_MIN', 2000))
+# Processes in that pool (0 = one per CPU)
+PREPROCESS_WORKERS = int(os.getenv('PREPROCESS_WORKERS', 0)) or os.cpu_count() or 1
+
+_URL_RE = re.compile(r'https?://\S+|www\.\S+')
+_TOKEN_RE = re.compile(r'\w+')
+_PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def tokenize(text, tokenizer=None):
+    tokenizer = tokenizer or PREPROCESS_TOKENIZER
+    if tokenizer == 'regex':
+        return _TOKEN_RE.findall(text)
+    if has_resource('punkt'):
+        from nltk.tokenize import word_tokenize
+        return word_tokenize(text)
+    # Fall back to whitespace tokens until the punkt data is available
+    warn_missing('punkt', 'splitting on whitespace')
+    return text.split()
+
+
+def missing_preprocessing_resources(tokenizer=None):
+    """NLTK resources preprocess_text needs but does not have yet.
+
+    Until this is empty its output differs from the normal one, so nothing
+    derived from it (embedding keys, SimHash fingerprints, cache keys) should
+    be persisted.
+    """
+    needed = ['stopwords'] if (tokenizer or PREPROCESS_TOKENIZER) == 'regex' else ['punkt', 'stopwords']
+    return [name for name in needed if not has_resource(name)]
+
+
+def preprocess_text(text, tokenizer=None):
+    """Lowercase, drop URLs and punctuation, tokenize and remove English/French stopwords."""
+    if text is None:
+        return ''
+    text = _URL_RE.sub('', text.lower()).translate(_PUNCTUATION_TABLE)
+    stop_words = get_stop_words()
+    return ' '.join(token for token in tokenize(text, tokenizer) if token not in stop_words)
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned rather than forked: by now the process runs the model warm-up, NLTK download,
+            # index bootstrap and Mongo monitor threads, and a forked child could inherit their held locks
+            _pool = ProcessPoolExecutor(max_workers=PREPROCESS_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+
+def preprocess_many(texts, tokenizer=None):
+    """preprocess_text over a list, in order.
+
+    Short lists run inline; lists of PREPROCESS_PARALLEL_MIN texts or more are
+    split in chunks across a process pool shared by the whole process.
+    """
+    texts = list(texts)
+    tokenizer = tokenizer or PREPROCESS_TOKENIZER
+    if len(texts) < PREPROCESS_PARALLEL_MIN:
+        return [preprocess_text(text, tokenizer) for text in texts]
+
+    chunksize = max(1, len(texts) // (PREPROCESS_WORKERS * 4))
+    return list(_get_pool().map(preprocess_text, texts, [tokenizer] * len(texts), chunksize=chunksize))
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pymongo import UpdateOne
+from config.DBs import lazy_db
+
+# Entries kept in the in-memory LRU in front of the summary_cache collection
+SUMMARY_CACHE_SIZE = int(os.getenv('SUMMARY_CACHE_SIZE', 10000))
+
+
+class SummaryCache:
+    """QA/NER results keyed by (model id, task, task parameters, question, hash of the text).
+
+    Lookups hit an in-memory LRU first, then the summary_cache collection;
+    only texts missing from both are sent to the model.
+    """
+
+    def __init__(self, db, collection='summary_cache', max_entries=None):
+        self.collection = db[collection]
+        self.max_entries = max_entries or SUMMARY_CACHE_SIZE
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key_for(model_id, task, params, question, text):
+        text_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        key = json.dumps([model_id, task, params or {}, question, text_hash], sort_keys=True)
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def _remember(self, key, value):
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def get_many(self, keys):
+        found, missing = {}, []
+        with self.lock:
+            for key in dict.fromkeys(keys):
+                if key in self.memory:
+                    self.memory.move_to_end(key)
+                    found[key] = self.memory[key]
+                else:
+                    missing.append(key)
+        if missing:
+            stored = {doc['_id']: doc['value'] for doc in self.collection.find({'_id': {'$in': missing}})}
+            with self.lock:
+                for key, value in stored.items():
+                    self._remember(key, value)
+            found.update(stored)
+        return found
+
+    def put_many(self, values_by_key, model_id=None, task=None, params=None):
+        if not values_by_key:
+            return
+        with self.lock:
+            for key, value in values_by_key.items():
+                self._remember(key, value)
+        # model, task and params are stored so that stale results can be deleted by query
+        self.collection.bulk_write([
+            UpdateOne({'_id': key}, {'$set': {'value': value, 'model': model_id, 'task': task, 'params': params or {}}}, upsert=True)
+            for key, value in values_by_key.items()
+        ], ordered=False)
+
+    def lookup(self, model_id, items, compute_fn, task, params=None):
+        """Return one value per (question, text) item, calling compute_fn only for uncached items.
+
+        task names what is computed from the model output (e.g. 'answer',
+        'redact') and params holds its settings, such as a score threshold;
+        both are part of the key. question is None for tasks that take none.
+        compute_fn receives the list of missing (question, text) items and must
+        return their values in the same order.
+        """
+        keys = [SummaryCache.key_for(model_id, task, params, question, text) for question, text in items]
+        values = self.get_many(keys)
+
+        missing = {}
+        for key, item in zip(keys, items):
+            if key not in values and key not in missing:
+                missing[key] = item
+        if missing:
+            computed = dict(zip(missing, compute_fn(list(missing.values()))))
+            self.put_many(computed, model_id=model_id, task=task, params=params)
+            values.update(computed)
+
+        return [values[key] for key in keys]
+
+
+_summary_cache = None
+_summary_cache_lock = threading.Lock()
+
+
+def get_summary_cache():
+    """Process-wide SummaryCache, so the in-memory LRU is shared by every request."""
+    global _summary_cache
+    with _summary_cache_lock:
+        if _summary_cache is None:
+            _summary_cache = SummaryCache(lazy_db())
+        return _summary_cache
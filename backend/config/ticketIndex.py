@@ -0,0 +1,335 @@
+import atexit
+import logging
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+from pymongo import UpdateOne
+from config.embeddingStore import EmbeddingStore
+from config.embeddings import EMBEDDING_MODEL_ID, get_bert_embeddings
+from config.preprocessing import missing_preprocessing_resources, preprocess_many
+
+# Where the similar-ticket index is persisted between restarts
+TICKET_INDEX_PATH = os.getenv(
+    'TICKET_INDEX_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'indexes', 'ticket_index.npz')
+)
+# Inverted lists scanned per query; more lists is slower but closer to exact search
+TICKET_INDEX_NPROBE = int(os.getenv('TICKET_INDEX_NPROBE', 8))
+# Replaced or removed vectors are compacted out once they make up this share of the stored rows
+TICKET_INDEX_MAX_DEAD_RATIO = float(os.getenv('TICKET_INDEX_MAX_DEAD_RATIO', 0.25))
+# Seconds between two saves of the index after classification runs; it is also saved at exit
+TICKET_INDEX_SAVE_INTERVAL = int(os.getenv('TICKET_INDEX_SAVE_INTERVAL', 300))
+
+# Below this many vectors the index keeps a single list, i.e. searches exactly
+IVF_MIN_TRAIN_SIZE = 2048
+# Vectors sampled to train the centroids, per centroid
+KMEANS_SAMPLES_PER_LIST = 64
+KMEANS_ITERATIONS = 10
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def _top_k(scores, k):
+    """Indices of the k highest scores, best first."""
+    if k < len(scores):
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(len(scores))
+    return top[np.argsort(-scores[top])]
+
+
+def train_centroids(vectors, n_lists, seed=0):
+    """Spherical k-means: n_lists unit centroids for unit vectors."""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), n_lists * KMEANS_SAMPLES_PER_LIST)
+    sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assignments = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, sample)
+        empty = ~sums.any(axis=1)
+        # Reseed empty lists on random sample points so every list stays in use
+        sums[empty] = sample[rng.choice(sample_size, int(empty.sum()), replace=False)]
+        centroids = _normalize(sums)
+    return centroids
+
+
+class TicketIndex:
+    """IVF (inverted file) index of ticket vectors for cosine top-k search.
+
+    Every vector sits in the inverted list of its nearest k-means centroid,
+    and a query only scores the vectors of its nprobe nearest lists. Vectors
+    are appended as tickets get embedded; replaced or removed ones are
+    tombstoned until they make up TICKET_INDEX_MAX_DEAD_RATIO of the rows,
+    then compacted out. The centroids are retrained once the number of live
+    vectors has doubled since they were trained.
+    """
+
+    def __init__(self, dim=None):
+        self._reset(dim)
+        self.dirty = False
+        self.saved_at = 0.0
+        self.lock = threading.RLock()
+
+    def _reset(self, dim):
+        self.dim = dim
+        self.vectors = np.empty((0, dim or 0), dtype=np.float32)
+        self.size = 0
+        self.ids = []
+        self.keys = []
+        self.alive = []
+        self.row_by_id = {}
+        self.centroids = None
+        self.lists = [[]]
+        self.trained_size = 0
+        self.dirty = True
+
+    def __len__(self):
+        return len(self.row_by_id)
+
+    def key_of(self, ticket_id):
+        row = self.row_by_id.get(ticket_id)
+        return None if row is None else self.keys[row]
+
+    def vector_of(self, ticket_id):
+        with self.lock:
+            row = self.row_by_id.get(ticket_id)
+            return None if row is None else self.vectors[row].copy()
+
+    def _reserve(self, extra):
+        needed = self.size + extra
+        if needed > len(self.vectors):
+            grown = np.empty((max(needed, 2 * len(self.vectors), 1024), self.dim), dtype=np.float32)
+            grown[:self.size] = self.vectors[:self.size]
+            self.vectors = grown
+
+    def _assign(self, vectors):
+        if self.centroids is None:
+            return np.zeros(len(vectors), dtype=np.int64)
+        return np.argmax(vectors @ self.centroids.T, axis=1)
+
+    def add(self, ticket_ids, keys, vectors):
+        """Insert or replace the vectors of ticket_ids; keys are their EmbeddingKey values."""
+        if not len(ticket_ids):
+            return
+        vectors = _normalize(vectors)
+        with self.lock:
+            if self.dim != vectors.shape[1]:
+                if self.size:
+                    # Vectors of another width come from another model: the old ones cannot be compared with them
+                    logging.warning(f'Ticket index holds {self.dim}-dimensional vectors, got {vectors.shape[1]}: starting over')
+                self._reset(vectors.shape[1])
+            self.remove(ticket_ids)
+            self._reserve(len(ticket_ids))
+            start = self.size
+            self.vectors[start:start + len(vectors)] = vectors
+            self.size += len(vectors)
+            for offset, (ticket_id, key, list_id) in enumerate(zip(ticket_ids, keys, self._assign(vectors))):
+                row = start + offset
+                self.ids.append(ticket_id)
+                self.keys.append(key)
+                self.alive.append(True)
+                self.row_by_id[ticket_id] = row
+                self.lists[list_id].append(row)
+            self.dirty = True
+            if len(self) >= max(IVF_MIN_TRAIN_SIZE, 2 * self.trained_size):
+                self.retrain()
+            else:
+                self._compact_if_needed()
+
+    def remove(self, ticket_ids):
+        with self.lock:
+            for ticket_id in ticket_ids:
+                row = self.row_by_id.pop(ticket_id, None)
+                if row is not None:
+                    self.alive[row] = False
+                    self.dirty = True
+
+    def _compact_if_needed(self):
+        if self.size - len(self) > TICKET_INDEX_MAX_DEAD_RATIO * self.size:
+            self.compact()
+
+    def _drop_dead_rows(self):
+        rows = [row for row in range(self.size) if self.alive[row]]
+        self.vectors = np.ascontiguousarray(self.vectors[rows])
+        self.ids = [self.ids[row] for row in rows]
+        self.keys = [self.keys[row] for row in rows]
+        self.alive = [True] * len(rows)
+        self.size = len(rows)
+        self.row_by_id = {ticket_id: row for row, ticket_id in enumerate(self.ids)}
+
+    def compact(self):
+        """Drop tombstoned rows and rebuild the inverted lists, keeping the trained centroids."""
+        with self.lock:
+            self._drop_dead_rows()
+            self._rebuild_lists(self._assign(self.vectors))
+            self.dirty = True
+
+    def retrain(self):
+        """Compact out tombstoned rows, retrain the centroids and rebuild the inverted lists."""
+        with self.lock:
+            self._drop_dead_rows()
+            if self.size >= IVF_MIN_TRAIN_SIZE:
+                self.centroids = train_centroids(self.vectors, int(np.sqrt(self.size)))
+            else:
+                self.centroids = None
+            self._rebuild_lists(self._assign(self.vectors))
+            self.trained_size = self.size
+            self.dirty = True
+
+    def _rebuild_lists(self, assignments):
+        self.lists = [[] for _ in range(1 if self.centroids is None else len(self.centroids))]
+        for row, list_id in enumerate(assignments):
+            if self.alive[row]:
+                self.lists[list_id].append(row)
+
+    def search(self, vector, k=10, nprobe=None, exclude=()):
+        """Return up to k (ticket_id, cosine score) pairs, best first."""
+        query = _normalize(vector)[0]
+        with self.lock:
+            if not len(self):
+                return []
+            if self.centroids is None:
+                probed = range(len(self.lists))
+            else:
+                probed = _top_k(self.centroids @ query, nprobe or TICKET_INDEX_NPROBE)
+            rows = np.fromiter(
+                (row for list_id in probed for row in self.lists[list_id] if self.alive[row]),
+                dtype=np.int64
+            )
+            if not len(rows):
+                return []
+            scores = self.vectors[rows] @ query
+            results = []
+            for position in _top_k(scores, k + len(exclude)):
+                ticket_id = self.ids[rows[position]]
+                if ticket_id not in exclude:
+                    results.append((ticket_id, float(scores[position])))
+            return results[:k]
+
+    def sync(self, db):
+        """Bring the index in line with the EmbeddingKey of every ticket in jira_tickets."""
+        current = {
+            str(doc['_id']): doc['EmbeddingKey']
+            for doc in db.jira_tickets.find({'EmbeddingKey': {'$exists': True}}, {'EmbeddingKey': 1})
+        }
+        with self.lock:
+            self.remove([ticket_id for ticket_id in list(self.row_by_id) if ticket_id not in current])
+            self._compact_if_needed()
+            changed = {ticket_id: key for ticket_id, key in current.items() if self.key_of(ticket_id) != key}
+        if changed:
+            stored = EmbeddingStore(db, EMBEDDING_MODEL_ID).get_many(list(changed.values()))
+            ticket_ids = [ticket_id for ticket_id, key in changed.items() if key in stored]
+            if ticket_ids:
+                self.add(ticket_ids, [changed[ticket_id] for ticket_id in ticket_ids],
+                         np.vstack([stored[changed[ticket_id]] for ticket_id in ticket_ids]))
+        logging.info(f'Ticket index synced: {len(self)} tickets, {len(changed)} added or updated')
+
+    def save(self, path=None, min_interval=0):
+        """Write the index to path if it changed, and at most once per min_interval seconds."""
+        path = path or TICKET_INDEX_PATH
+        with self.lock:
+            if not self.dirty or time.monotonic() - self.saved_at < min_interval:
+                return
+            rows = [row for row in range(self.size) if self.alive[row]]
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # A temp file of its own per save, so concurrent writers (other workers) never share one
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.ticket_index.', suffix='.npz')
+            try:
+                with os.fdopen(fd, 'wb') as temp_file:
+                    np.savez(
+                        temp_file,
+                        model=np.array(EMBEDDING_MODEL_ID),
+                        vectors=self.vectors[rows],
+                        ids=np.array([self.ids[row] for row in rows]),
+                        keys=np.array([self.keys[row] for row in rows]),
+                        centroids=self.centroids if self.centroids is not None else np.empty((0, self.dim or 0), dtype=np.float32),
+                        trained_size=np.array(self.trained_size),
+                    )
+                os.replace(temp_path, path)
+            except BaseException:
+                os.remove(temp_path)
+                raise
+            self.dirty = False
+            self.saved_at = time.monotonic()
+
+    @classmethod
+    def load(cls, path=None, dim=None):
+        """Index saved at path, or None when there is none for the current embedding model (and dim, if given)."""
+        path = path or TICKET_INDEX_PATH
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                if str(data['model']) != EMBEDDING_MODEL_ID:
+                    return None
+                vectors = data['vectors']
+                if dim is not None and vectors.shape[1] != dim:
+                    logging.warning(f'Ignoring ticket index {path}: {vectors.shape[1]}-dimensional vectors, expected {dim}')
+                    return None
+                index = cls(dim=vectors.shape[1])
+                index.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+                index.size = len(vectors)
+                index.ids = [str(ticket_id) for ticket_id in data['ids']]
+                index.keys = [str(key) for key in data['keys']]
+                index.alive = [True] * index.size
+                index.row_by_id = {ticket_id: row for row, ticket_id in enumerate(index.ids)}
+                index.centroids = data['centroids'] if len(data['centroids']) else None
+                index.trained_size = int(data['trained_size'])
+        except Exception as e:
+            logging.warning(f'Ignoring unreadable ticket index {path}: {e}')
+            return None
+        index._rebuild_lists(index._assign(index.vectors))
+        return index
+
+
+_ticket_index = None
+_ticket_index_lock = threading.Lock()
+
+
+def get_ticket_index(db):
+    """Process-wide TicketIndex: loaded from disk, or built, then synced with the database once."""
+    global _ticket_index
+    with _ticket_index_lock:
+        if _ticket_index is None:
+            dim = EmbeddingStore(db, EMBEDDING_MODEL_ID).dimension()
+            index = TicketIndex.load(dim=dim) or TicketIndex(dim)
+            index.sync(db)
+            index.save()
+            atexit.register(index.save)
+            _ticket_index = index
+        return _ticket_index
+
+
+def index_tickets(db, tickets):
+    """Embed the descriptions of tickets just written to jira_tickets and add them to the ticket index.
+
+    tickets are documents with their _id and Description. Tickets without a
+    usable description are left out, and nothing is indexed while the NLTK
+    data is missing, as the EmbeddingKey would differ from the one
+    classification stores. Failures are logged so that ingest never depends
+    on the embedding model being available.
+    """
+    if not tickets or missing_preprocessing_resources():
+        return
+    try:
+        texts = preprocess_many(ticket.get('Description') or '' for ticket in tickets)
+        indexed = [(ticket, text) for ticket, text in zip(tickets, texts) if text.strip()]
+        if not indexed:
+            return
+        keys, vectors = EmbeddingStore(db, EMBEDDING_MODEL_ID).embed([text for _, text in indexed], get_bert_embeddings)
+        db.jira_tickets.bulk_write([
+            UpdateOne({'_id': ticket['_id']}, {'$set': {'EmbeddingKey': key}})
+            for (ticket, _), key in zip(indexed, keys)
+        ], ordered=False)
+        get_ticket_index(db).add([str(ticket['_id']) for ticket, _ in indexed], keys, vectors)
+    except Exception as e:
+        logging.warning(f'Could not add {len(tickets)} tickets to the ticket index: {e}')
@@ -0,0 +1,135 @@
+import logging
+import threading
+import numpy as np
+from bson import ObjectId
+from bson.binary import Binary
+from config.embeddings import EMBEDDING_MODEL_ID, get_bert_embeddings
+
+# Scorer for the most recently loaded tree version, shared by all requests of this process
+_scorer_cache = {'version': None, 'scorer': None}
+_scorer_lock = threading.Lock()
+
+def get_leaf_paths(tree, current_path=[]):
+    if "children" not in tree or not tree["children"]:
+        return [' -> '.join(current_path + [tree["name"]])]
+    paths = []
+    for child in tree["children"]:
+        paths.extend(get_leaf_paths(child, current_path + [tree["name"]]))
+    return paths
+
+class LeafPathScorer:
+    """Scores ticket vectors against every leaf path of the classification tree.
+
+    Leaf vectors are L2-normalized once into a contiguous matrix, so cosine
+    similarity for a whole batch of tickets is a single matrix multiply.
+    """
+
+    def __init__(self, leaf_paths, X_paths, chunk_size=1024):
+        self.leaf_paths = list(leaf_paths)
+        self.matrix = np.ascontiguousarray(self._normalize(X_paths))
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def _normalize(vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def top_matches(self, ticket_vectors, k=3, threshold=0.5):
+        """Return, for each ticket vector, up to k (path, score) pairs above threshold, best first."""
+        ticket_vectors = np.asarray(ticket_vectors, dtype=np.float32)
+        if ticket_vectors.ndim == 1:
+            ticket_vectors = ticket_vectors.reshape(1, -1)
+        n_leaves = len(self.leaf_paths)
+        if n_leaves == 0:
+            return [[] for _ in range(len(ticket_vectors))]
+        k = min(k, n_leaves)
+
+        results = []
+        for start in range(0, len(ticket_vectors), self.chunk_size):
+            scores = self._normalize(ticket_vectors[start:start + self.chunk_size]) @ self.matrix.T
+            if k < n_leaves:
+                top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            else:
+                top = np.tile(np.arange(n_leaves), (len(scores), 1))
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+            for row_indices, row_scores in zip(top, top_scores):
+                results.append([
+                    (self.leaf_paths[i], float(score))
+                    for i, score in zip(row_indices, row_scores) if score >= threshold
+                ])
+        return results
+
+def new_tree_version():
+    return str(ObjectId())
+
+def build_leaf_matrix(tree, previous=None):
+    """Return (leaf_paths, vectors) for every leaf of a classification tree document.
+
+    previous is an earlier (leaf_paths, vectors) pair; rows whose path text is
+    unchanged are copied from it and only new or renamed paths are embedded.
+    """
+    leaf_paths = get_leaf_paths(tree)
+    known = {}
+    if previous:
+        known = {path: vector for path, vector in zip(*previous)}
+    missing = list(dict.fromkeys(path for path in leaf_paths if path not in known))
+    if missing:
+        known.update(zip(missing, get_bert_embeddings(missing)))
+    if not leaf_paths:
+        return leaf_paths, np.empty((0, 0), dtype=np.float32)
+    return leaf_paths, np.vstack([known[path] for path in leaf_paths]).astype(np.float32)
+
+def save_leaf_matrix(db, tree_version, leaf_paths, vectors):
+    """Store the leaf-path embedding matrix of a tree version and drop older versions."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    db.leaf_path_matrices.replace_one(
+        {'tree_version': tree_version},
+        {
+            'tree_version': tree_version,
+            'model': EMBEDDING_MODEL_ID,
+            'leaf_paths': leaf_paths,
+            'dim': int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+            'matrix': Binary(vectors.tobytes()),
+        },
+        upsert=True
+    )
+    db.leaf_path_matrices.delete_many({'tree_version': {'$ne': tree_version}})
+
+def load_leaf_matrix(db, tree_version):
+    doc = db.leaf_path_matrices.find_one({'tree_version': tree_version, 'model': EMBEDDING_MODEL_ID})
+    if not doc:
+        return None
+    vectors = np.frombuffer(doc['matrix'], dtype=np.float32).reshape(len(doc['leaf_paths']), doc['dim'])
+    return doc['leaf_paths'], vectors
+
+def load_leaf_scorer(db, tree):
+    """Return a LeafPathScorer for the stored classification tree.
+
+    The leaf matrix is read from leaf_path_matrices for the tree's version and
+    kept in memory until the version changes. Trees saved before versioning
+    existed get a version assigned here and their matrix built once.
+    """
+    tree_version = tree.get('version')
+    with _scorer_lock:
+        if tree_version and _scorer_cache['version'] == tree_version:
+            return _scorer_cache['scorer']
+
+        stored = load_leaf_matrix(db, tree_version) if tree_version else None
+        if stored:
+            leaf_paths, vectors = stored
+        else:
+            logging.info('No stored leaf matrix for tree version %s, building it.', tree_version)
+            leaf_paths, vectors = build_leaf_matrix(tree)
+            if not tree_version:
+                tree_version = new_tree_version()
+                db.classification_tree.update_one({'_id': tree['_id']}, {'$set': {'version': tree_version}})
+                tree['version'] = tree_version
+            save_leaf_matrix(db, tree_version, leaf_paths, vectors)
+
+        scorer = LeafPathScorer(leaf_paths, vectors)
+        _scorer_cache.update(version=tree_version, scorer=scorer)
+        return scorer
@@ -1,7 +1,7 @@
 class JiraTicket:
     def __init__(self, Key: str, Title: str, Created: int, Updated: int, Status: str, Project: str, Component: str, 
                  TicketType: str, Resolution: str, Description: str, Comments: str, SumDesc: str, SumComm: str, 
-                 TicketSum: str, Embedding: list, Activated: bool = True):
+                 TicketSum: str, Embedding: list, Activated: bool = True, SimHash: int = None, DuplicateOf: str = None):
         self.Key = Key
         self.Title = Title
         self.Created = Created
@@ -18,6 +18,8 @@ class JiraTicket:
         self.TicketSum = TicketSum
         self.Embedding = Embedding
         self.Activated = Activated
+        self.SimHash = SimHash
+        self.DuplicateOf = DuplicateOf
 
     def to_dict(self) -> dict:
         return {
@@ -37,6 +39,8 @@ class JiraTicket:
             'TicketSum': self.TicketSum,
             'Embedding': self.Embedding,
             'Activated': self.Activated,
+            'SimHash': self.SimHash,
+            'DuplicateOf': self.DuplicateOf,
         }
 
     @staticmethod
@@ -55,5 +59,9 @@ class JiraTicket:
             Comments=data.get('Comments', ''),
             SumDesc=data.get('SumDesc', ''),
             SumComm=data.get('SumComm', ''),
-            Activated=data.get('Activated', True)
+            TicketSum=data.get('TicketSum', ''),
+            Embedding=data.get('Embedding', []),
+            Activated=data.get('Activated', True),
+            SimHash=data.get('SimHash'),
+            DuplicateOf=data.get('DuplicateOf')
         )
@@ -0,0 +1,135 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+mongomock = pytest.importorskip('mongomock')
+
+import config.Jira as jira_sync
+
+
+class FakeJira:
+    """Serves search_issues pages from a list of issues and records how many calls overlap."""
+
+    def __init__(self, issues, delay=0.01):
+        self.issues = issues
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = []
+        self.clients = 0
+
+    def connect(self):
+        with self.lock:
+            self.clients += 1
+        return SimpleNamespace(search_issues=self.search_issues)
+
+    def search_issues(self, jql_query, startAt=0, maxResults=50, fields=None):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.requests.append((startAt, maxResults, tuple(fields or ())))
+        try:
+            time.sleep(self.delay)
+            page = SearchPage(self.issues[startAt:startAt + maxResults])
+            page.total = len(self.issues)
+            return page
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+class SearchPage(list):
+    total = 0
+
+
+def fake_issue(number, updated='2024-01-01T00:00:00.000+0000', summary=None):
+    return SimpleNamespace(key=f'KAN-{number}', fields=SimpleNamespace(
+        summary=summary or f'Issue {number}',
+        description=f'Description of issue {number}',
+        status=SimpleNamespace(name='Open'),
+        created='2023-01-01T00:00:00.000+0000',
+        updated=updated,
+        project=SimpleNamespace(key='KAN'),
+        issuetype=SimpleNamespace(name='Bug'),
+        resolution=None,
+        comment=SimpleNamespace(comments=[SimpleNamespace(body='A comment')]),
+    ))
+
+
+@pytest.fixture
+def db(monkeypatch):
+    # Deduplication and the ticket index need NLTK data and BERT; these tests only cover fetching and writing
+    monkeypatch.setattr(jira_sync, 'flag_duplicates', lambda db, issues, check=True: 0)
+    monkeypatch.setattr(jira_sync, 'remember_fingerprints', lambda db, issues: None)
+    monkeypatch.setattr(jira_sync, 'index_tickets', lambda db, tickets: None)
+    return mongomock.MongoClient().jira_sync_test
+
+
+def stored_tickets(db):
+    return {doc['ID']: doc for doc in db.jira_tickets.find({}, {'_id': 0})}
+
+
+def test_sync_fetches_every_page_within_the_worker_limit(db):
+    jira = FakeJira([fake_issue(number) for number in range(250)])
+
+    result = jira_sync.sync_issues(db, jira.connect, 'project = KAN', page_size=20, workers=3)
+
+    assert result['new_count'] == 250
+    assert result['updated_count'] == 0
+    assert result['write_errors'] == []
+    assert set(stored_tickets(db)) == {f'KAN-{number}' for number in range(250)}
+    assert sorted(start for start, _, _ in jira.requests) == list(range(0, 250, 20))
+    assert all(size == 20 and fields == tuple(jira_sync.JIRA_FIELDS) for _, size, fields in jira.requests)
+    assert jira.max_in_flight <= 3
+    # The first page is fetched on its own client, then at most one client per worker
+    assert jira.clients <= 1 + 3
+
+
+def test_resync_of_unchanged_issues_changes_nothing(db, monkeypatch):
+    monkeypatch.setattr(jira_sync, 'SYNC_LOOKUP_CHUNK_SIZE', 7)
+    jira = FakeJira([fake_issue(number) for number in range(45)])
+    jira_sync.sync_issues(db, jira.connect, 'project = KAN', page_size=10, workers=2)
+    before = stored_tickets(db)
+
+    result = jira_sync.sync_issues(db, jira.connect, 'project = KAN', page_size=10, workers=2)
+
+    assert result['new_count'] == 0
+    assert result['updated_count'] == 0
+    assert len(result['issues']) == 45
+    assert stored_tickets(db) == before
+
+
+def test_resync_writes_only_updated_issues(db, monkeypatch):
+    monkeypatch.setattr(jira_sync, 'SYNC_LOOKUP_CHUNK_SIZE', 7)
+    issues = [fake_issue(number) for number in range(45)]
+    jira_sync.sync_issues(db, FakeJira(issues).connect, 'project = KAN', page_size=10, workers=2)
+
+    edited = {3, 17, 44}
+    for number in edited:
+        issues[number] = fake_issue(number, updated='2024-02-01T00:00:00.000+0000', summary=f'Edited {number}')
+    issues.append(fake_issue(45))
+    result = jira_sync.sync_issues(db, FakeJira(issues).connect, 'project = KAN', page_size=10, workers=2)
+
+    assert result['new_count'] == 1
+    assert result['updated_count'] == len(edited)
+    tickets = stored_tickets(db)
+    assert len(tickets) == 46
+    assert {ticket_id for ticket_id, ticket in tickets.items() if ticket['Title'].startswith('Edited')} == \
+        {f'KAN-{number}' for number in edited}
+
+
+def test_failed_write_is_reported_and_does_not_stop_the_sync(db):
+    db.jira_tickets.create_index('Title', unique=True)
+    db.jira_tickets.insert_one({'ID': 'OTHER-1', 'Title': 'Taken title', 'Updated': '2024-01-01T00:00:00.000+0000'})
+    issues = [fake_issue(number) for number in range(30)]
+    issues[12] = fake_issue(12, summary='Taken title')
+
+    result = jira_sync.sync_issues(db, FakeJira(issues).connect, 'project = KAN', page_size=10, workers=2)
+
+    assert [error['ref'] for error in result['write_errors']] == ['KAN-12']
+    tickets = stored_tickets(db)
+    assert 'KAN-12' not in tickets
+    assert len(tickets) == 30
@@ -1,6 +1,7 @@
 import axios from 'axios';
 import {
     getTickets,
+    getTicketFilters,
     addTicket,
     updateTicket,
     deleteTicket,
@@ -9,16 +10,28 @@ import {
 
 const API = '/jira';
 
-export const getTicketsAsync = () => async (dispatch) => {
+// params: cursor, limit, fields and the Project/Status/Type/Activated filters of GET /jira/.
+// Resolves to the page, whose next_cursor fetches the following one.
+export const getTicketsAsync = (params = {}) => async (dispatch) => {
     try {
-        const response = await axios.get(`${API}/`);
+        const response = await axios.get(`${API}/`, { params });
         console.log("Fetched tickets response:", response.data); // Debug log
-        dispatch(getTickets(response.data.data)); // Update this line
+        dispatch(getTickets(response.data.data));
+        return response.data;
     } catch (error) {
         console.error('Error fetching tickets:', error);
     }
 };
 
+export const getTicketFiltersAsync = () => async (dispatch) => {
+    try {
+        const response = await axios.get(`${API}/filters`);
+        dispatch(getTicketFilters(response.data.data));
+    } catch (error) {
+        console.error('Error fetching ticket filters:', error);
+    }
+};
+
 export const addTicketAsync = (ticket) => async (dispatch) => {
     try {
         const response = await axios.post(`${API}/`, ticket);
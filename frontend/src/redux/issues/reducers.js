@@ -2,6 +2,7 @@ import { createSlice } from '@reduxjs/toolkit';
 
 const initialState = {
     tickets: [],
+    filterOptions: { Project: [], Status: [], Type: [], Resolution: [] },
     notif: {}
 };
 
@@ -12,6 +13,9 @@ const jiraSlice = createSlice({
         getTickets(state, action) {
             state.tickets = action.payload;
         },
+        getTicketFilters(state, action) {
+            state.filterOptions = action.payload;
+        },
         addTicket(state, action) {
             state.tickets.push(action.payload);
         },
@@ -33,6 +37,6 @@ const jiraSlice = createSlice({
     }
 });
 
-export const { getTickets, addTicket, updateTicket, deleteTicket, toggleTicketActivation } = jiraSlice.actions;
+export const { getTickets, getTicketFilters, addTicket, updateTicket, deleteTicket, toggleTicketActivation } = jiraSlice.actions;
 
 export default jiraSlice.reducer;
@@ -11,12 +11,20 @@ const Charts = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const response = await fetch('http://localhost:5000/best_matches_bp');
-        if (!response.ok) {
-          throw new Error('Network response was not ok');
-        }
-        const result = await response.json();
-        const issues = result.data || [];
+        // The charts aggregate every matched issue, so walk all the pages, fetching only the charted fields
+        const issues = [];
+        let cursor = null;
+        do {
+          const params = new URLSearchParams({ no_match: 'false', fields: 'best_matches,issue.Status', limit: 500 });
+          if (cursor) params.set('cursor', cursor);
+          const response = await fetch(`http://localhost:5000/best_matches_bp/?${params}`);
+          if (!response.ok) {
+            throw new Error('Network response was not ok');
+          }
+          const result = await response.json();
+          issues.push(...(result.data || []));
+          cursor = result.next_cursor;
+        } while (cursor);
         const filteredIssues = issues.filter(issue => issue.best_matches && issue.best_matches.length > 0);
         setData(filteredIssues);
         calculateAverageSimilarity(filteredIssues);
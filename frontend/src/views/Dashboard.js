@@ -2,10 +2,13 @@ import React, { useState, useEffect } from 'react';
 import 'bootstrap/dist/css/bootstrap.min.css';
 import { Modal, Button, Form, Row, Col, Pagination } from 'react-bootstrap';
 
+const API = 'http://localhost:5000/best_matches_bp';
+
 export default function Dashboard() {
   const [matches, setMatches] = useState([]);
-  const [filteredMatches, setFilteredMatches] = useState([]);
   const [similarIssues, setSimilarIssues] = useState([]);
+  // Cursor of the next page of similar issues, null once they are all loaded
+  const [similarCursor, setSimilarCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [showModal, setShowModal] = useState(false);
   const [showQuestionModal, setShowQuestionModal] = useState(false);
@@ -17,24 +20,57 @@ export default function Dashboard() {
   const [filters, setFilters] = useState({ status: '', project: '', startDate: '', endDate: '' });
   const [statuses, setStatuses] = useState([]);
   const [currentPage, setCurrentPage] = useState(1);
+  // cursors[i] is the cursor of page i + 1 (null for the first page); pages load one at a time
+  const [cursors, setCursors] = useState([null]);
   const matchesPerPage = 3;
 
+  // Query parameters of the best match listing for the current filters, matched issues only
+  const getFilterParams = () => {
+    const params = new URLSearchParams({ no_match: 'false' });
+    if (filters.status) params.set('status', filters.status);
+    if (filters.project) params.set('project', filters.project);
+    if (filters.startDate) params.set('created_from', filters.startDate);
+    if (filters.endDate) params.set('created_to', filters.endDate);
+    return params;
+  };
+
   useEffect(() => {
-    const fetchBestMatches = async () => {
+    const fetchStatuses = async () => {
       try {
-        const response = await fetch('http://localhost:5000/best_matches_bp');
+        const response = await fetch('http://localhost:5000/jira/filters');
         if (!response.ok) {
           throw new Error('Network response was not ok');
         }
         const data = await response.json();
+        setStatuses(data.data?.Status || []);
+      } catch (error) {
+        console.error('Error fetching statuses:', error);
+      }
+    };
 
-        // Filter directly using the fetched data
-        const filtered = (data.data || []).filter(issue => issue.best_matches && issue.best_matches.length > 0);
-        setMatches(filtered); // Set only filtered matches
-        setFilteredMatches(filtered);
+    fetchStatuses();
+  }, []);
 
-        const uniqueStatuses = [...new Set(filtered.map(item => item.issue.Status))];
-        setStatuses(uniqueStatuses);
+  useEffect(() => {
+    const fetchBestMatches = async () => {
+      try {
+        const params = getFilterParams();
+        params.set('limit', matchesPerPage);
+        if (cursors[currentPage - 1]) {
+          params.set('cursor', cursors[currentPage - 1]);
+        }
+        const response = await fetch(`${API}/?${params}`);
+        if (!response.ok) {
+          throw new Error('Network response was not ok');
+        }
+        const data = await response.json();
+        setMatches(data.data || []);
+
+        // Remember where the next page starts
+        setCursors((previous) => {
+          const known = previous.slice(0, currentPage);
+          return data.next_cursor ? [...known, data.next_cursor] : known;
+        });
 
         setLoading(false);
       } catch (error) {
@@ -44,25 +80,65 @@ export default function Dashboard() {
     };
 
     fetchBestMatches();
-  }, []);
-
-  useEffect(() => {
-    applyFilters();
-  }, [filters, matches]);
-
-  const handleShowSimilarities = (path) => {
-    const similarIssues = filteredMatches.filter((match) =>
-      match.best_matches && match.best_matches.some((bm) => bm.path === path || bm.path.startsWith(path + ' ->') || path.startsWith(bm.path + ' ->'))
-    );
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [filters, currentPage]);
+
+  // One page of the issues with any best match on this path, below it or on one of its ancestors
+  const fetchSimilarPage = async (path, cursor) => {
+    const params = getFilterParams();
+    params.set('similar_to', path);
+    params.set('limit', 100);
+    if (cursor) params.set('cursor', cursor);
+    const response = await fetch(`${API}/?${params}`);
+    if (!response.ok) {
+      throw new Error('Network response was not ok');
+    }
+    return response.json();
+  };
 
-    setSimilarIssues(similarIssues);
+  const handleShowSimilarities = async (path) => {
+    try {
+      const data = await fetchSimilarPage(path, null);
+      setSimilarIssues(data.data || []);
+      setSimilarCursor(data.next_cursor || null);
+    } catch (error) {
+      console.error('Error fetching similar issues:', error);
+      setSimilarIssues([]);
+      setSimilarCursor(null);
+    }
     setSelectedPath(path);
     setShowModal(true);
   };
 
+  const handleLoadMoreSimilarities = async () => {
+    try {
+      const data = await fetchSimilarPage(selectedPath, similarCursor);
+      setSimilarIssues(previous => [...previous, ...(data.data || [])]);
+      setSimilarCursor(data.next_cursor || null);
+    } catch (error) {
+      console.error('Error fetching similar issues:', error);
+    }
+  };
+
+  // The listing only carries a few issue fields; the summary shows the whole match
+  const fetchFullMatch = async (match) => {
+    try {
+      const response = await fetch(`${API}/${match._id}`);
+      if (!response.ok) {
+        throw new Error('Network response was not ok');
+      }
+      const data = await response.json();
+      return data.data || match;
+    } catch (error) {
+      console.error('Error fetching match details:', error);
+      return match;
+    }
+  };
+
   const handleCloseModal = () => {
     setShowModal(false);
     setSelectedPath(null);
+    setSimilarCursor(null);
   };
 
   const handleShowQuestionModal = (issue) => {
@@ -77,8 +153,8 @@ export default function Dashboard() {
     setSelectedIssue(null);
   };
 
-  const handleShowSummaryModal = (issue) => {
-    setSelectedIssue(issue);
+  const handleShowSummaryModal = async (issue) => {
+    setSelectedIssue(await fetchFullMatch(issue));
     setShowSummaryModal(true);
   };
 
@@ -87,34 +163,14 @@ export default function Dashboard() {
     setSelectedIssue(null);
   };
 
+  // Filtering happens on the server, so start over from the first page
   const handleFilterChange = (e) => {
     const { name, value } = e.target;
     setFilters({
       ...filters,
       [name]: value
     });
-  };
-
-  const applyFilters = () => {
-    let filtered = matches;
-
-    if (filters.status) {
-      filtered = filtered.filter(match => match.issue.Status === filters.status);
-    }
-
-    if (filters.project) {
-      filtered = filtered.filter(match => match.issue.Project === filters.project);
-    }
-
-    if (filters.startDate) {
-      filtered = filtered.filter(match => new Date(match.issue.Created) >= new Date(filters.startDate));
-    }
-
-    if (filters.endDate) {
-      filtered = filtered.filter(match => new Date(match.issue.Created) <= new Date(filters.endDate));
-    }
-
-    setFilteredMatches(filtered);
+    setCursors([null]);
     setCurrentPage(1);
   };
 
@@ -167,11 +223,7 @@ export default function Dashboard() {
     }
   };
 
-  const indexOfLastMatch = currentPage * matchesPerPage;
-  const indexOfFirstMatch = indexOfLastMatch - matchesPerPage;
-  const currentMatches = filteredMatches.slice(indexOfFirstMatch, indexOfLastMatch);
-
-  const totalPages = Math.ceil(filteredMatches.length / matchesPerPage);
+  const totalPages = cursors.length;
 
   const getPageNumbers = () => {
     const pageNumbers = [];
@@ -191,10 +243,7 @@ export default function Dashboard() {
     return '⭐'.repeat(filledStars) + '☆'.repeat(maxStars - filledStars);
   };
 
-  const handleViewDetailedTicket = (issue) => {
-    setSelectedIssue(issue);
-    setShowSummaryModal(true);
-  };
+  const handleViewDetailedTicket = (issue) => handleShowSummaryModal(issue);
 
   return (
     <div className="container my-4">
@@ -241,12 +290,12 @@ export default function Dashboard() {
             </div>
           </div>
         </div>
-      ) : filteredMatches.length === 0 ? (
+      ) : matches.length === 0 ? (
         <p className="text-center">No best matches found.</p>
       ) : (
         <>
           <div className="row">
-            {currentMatches.map((match, index) => (
+            {matches.map((match, index) => (
               <div key={index} className="col-md-4 mb-4">
                 <div className="card h-100 shadow-sm">
                   <div className="card-body d-flex flex-column justify-content-between">
@@ -301,7 +350,6 @@ export default function Dashboard() {
               </Pagination.Item>
             ))}
             <Pagination.Next onClick={() => setCurrentPage(prev => Math.min(prev + 1, totalPages))} disabled={currentPage === totalPages} />
-            <Pagination.Last onClick={() => setCurrentPage(totalPages)} disabled={currentPage === totalPages} />
           </Pagination>
         </>
       )}
@@ -345,6 +393,11 @@ export default function Dashboard() {
           )}
         </Modal.Body>
         <Modal.Footer>
+          {similarCursor && (
+            <Button variant="primary" onClick={handleLoadMoreSimilarities}>
+              Load More
+            </Button>
+          )}
           <Button variant="secondary" onClick={handleCloseModal}>
             Close
           </Button>
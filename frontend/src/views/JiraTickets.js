@@ -2,6 +2,7 @@ import React, { useEffect, useRef, useState } from "react";
 import { useDispatch, useSelector } from "react-redux";
 import {
   getTicketsAsync,
+  getTicketFiltersAsync,
   toggleTicketActivationAsync,
 } from "../redux/issues/actions"; // Adjust the path as necessary
 import NotificationAlert from "react-notification-alert";
@@ -23,10 +24,14 @@ function JiraTickets() {
     notificationAlertRef.current.notificationAlert(options);
   };
 
-  const { tickets, notif } = useSelector((state) => state.jira);
+  const { tickets, filterOptions, notif } = useSelector(
+    (state) => state.jira
+  );
   const dispatch = useDispatch();
 
   const [currentPage, setCurrentPage] = useState(1);
+  // cursors[i] is the cursor of page i + 1 (null for the first page); pages load one at a time
+  const [cursors, setCursors] = useState([null]);
   const ticketsPerPage = 5;
   const [maxPageNumberLimit, setMaxPageNumberLimit] = useState(5);
   const [minPageNumberLimit, setMinPageNumberLimit] = useState(0);
@@ -35,17 +40,42 @@ function JiraTickets() {
   const [showModal, setShowModal] = useState(false);
   const [selectedTicket, setSelectedTicket] = useState(null);
 
-  // Filter state
+  // Filter state, named after the GET /jira/ query parameters
   const [filters, setFilters] = useState({
-    project: "",
-    type: "",
-    resolution: "",
+    Project: "",
+    Status: "",
+    Type: "",
+    Resolution: "",
+    Activated: "",
   });
 
+  const fetchCurrentPage = async () => {
+    const params = { limit: ticketsPerPage };
+    if (cursors[currentPage - 1]) {
+      params.cursor = cursors[currentPage - 1];
+    }
+    Object.entries(filters).forEach(([name, value]) => {
+      if (value) {
+        params[name] = value;
+      }
+    });
+    const page = await dispatch(getTicketsAsync(params));
+    // Remember where the next page starts (a toggle can change it under an activation filter)
+    setCursors((previous) => {
+      const known = previous.slice(0, currentPage);
+      return page?.next_cursor ? [...known, page.next_cursor] : known;
+    });
+  };
+
   useEffect(() => {
-    dispatch(getTicketsAsync());
+    dispatch(getTicketFiltersAsync());
   }, [dispatch]);
 
+  useEffect(() => {
+    fetchCurrentPage();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [dispatch, currentPage, filters]);
+
   useEffect(() => {
     if (notif?.msg) {
       notify(notif, "tr");
@@ -54,7 +84,7 @@ function JiraTickets() {
 
   const handleToggleActivation = async (id) => {
     await dispatch(toggleTicketActivationAsync(id));
-    dispatch(getTicketsAsync()); // Refresh the tickets list after toggling activation
+    fetchCurrentPage(); // Refresh the current page after toggling activation
   };
 
   const handleShowModal = (ticket) => {
@@ -67,42 +97,18 @@ function JiraTickets() {
     setSelectedTicket(null);
   };
 
-  // Handle filter change
+  // Handle filter change: filtering happens on the server, so start over from the first page
   const handleFilterChange = (e) => {
     setFilters({
       ...filters,
       [e.target.name]: e.target.value,
     });
+    setCursors([null]);
+    setCurrentPage(1);
+    setMaxPageNumberLimit(pageNumberLimit);
+    setMinPageNumberLimit(0);
   };
 
-  // Get unique filter options from tickets
-  const getUniqueFilterOptions = (field) => {
-    return [...new Set(tickets.map((ticket) => ticket[field]))];
-  };
-
-  const filterOptions = {
-    project: getUniqueFilterOptions("Project"),
-    type: getUniqueFilterOptions("Type"),
-    resolution: getUniqueFilterOptions("Resolution"),
-  };
-
-  // Filter tickets based on filter state
-  const filteredTickets = tickets.filter((ticket) => {
-    return (
-      (filters.project ? ticket.Project === filters.project : true) &&
-      (filters.type ? ticket.Type === filters.type : true) &&
-      (filters.resolution ? ticket.Resolution === filters.resolution : true)
-    );
-  });
-
-  // Get current tickets
-  const indexOfLastTicket = currentPage * ticketsPerPage;
-  const indexOfFirstTicket = indexOfLastTicket - ticketsPerPage;
-  const currentTickets = filteredTickets.slice(
-    indexOfFirstTicket,
-    indexOfLastTicket
-  );
-
   // Change page
   const paginate = (pageNumber) => setCurrentPage(pageNumber);
 
@@ -126,17 +132,17 @@ function JiraTickets() {
     <div className="container-fluid">
       <NotificationAlert ref={notificationAlertRef} />
       <div className="row mb-3">
-        <div className="col-md-4">
+        <div className="col-md">
           <Form.Group controlId="filterProject">
             <Form.Label>Project</Form.Label>
             <Form.Control
               as="select"
-              name="project"
-              value={filters.project}
+              name="Project"
+              value={filters.Project}
               onChange={handleFilterChange}
             >
               <option value="">All</option>
-              {filterOptions.project.map((project) => (
+              {filterOptions.Project.map((project) => (
                 <option key={project} value={project}>
                   {project}
                 </option>
@@ -144,17 +150,35 @@ function JiraTickets() {
             </Form.Control>
           </Form.Group>
         </div>
-        <div className="col-md-4">
+        <div className="col-md">
+          <Form.Group controlId="filterStatus">
+            <Form.Label>Status</Form.Label>
+            <Form.Control
+              as="select"
+              name="Status"
+              value={filters.Status}
+              onChange={handleFilterChange}
+            >
+              <option value="">All</option>
+              {filterOptions.Status.map((status) => (
+                <option key={status} value={status}>
+                  {status}
+                </option>
+              ))}
+            </Form.Control>
+          </Form.Group>
+        </div>
+        <div className="col-md">
           <Form.Group controlId="filterType">
             <Form.Label>Type</Form.Label>
             <Form.Control
               as="select"
-              name="type"
-              value={filters.type}
+              name="Type"
+              value={filters.Type}
               onChange={handleFilterChange}
             >
               <option value="">All</option>
-              {filterOptions.type.map((type) => (
+              {filterOptions.Type.map((type) => (
                 <option key={type} value={type}>
                   {type}
                 </option>
@@ -162,17 +186,17 @@ function JiraTickets() {
             </Form.Control>
           </Form.Group>
         </div>
-        <div className="col-md-4">
+        <div className="col-md">
           <Form.Group controlId="filterResolution">
             <Form.Label>Resolution</Form.Label>
             <Form.Control
               as="select"
-              name="resolution"
-              value={filters.resolution}
+              name="Resolution"
+              value={filters.Resolution}
               onChange={handleFilterChange}
             >
               <option value="">All</option>
-              {filterOptions.resolution.map((resolution) => (
+              {filterOptions.Resolution.map((resolution) => (
                 <option key={resolution} value={resolution}>
                   {resolution}
                 </option>
@@ -180,6 +204,21 @@ function JiraTickets() {
             </Form.Control>
           </Form.Group>
         </div>
+        <div className="col-md">
+          <Form.Group controlId="filterActivated">
+            <Form.Label>Activation</Form.Label>
+            <Form.Control
+              as="select"
+              name="Activated"
+              value={filters.Activated}
+              onChange={handleFilterChange}
+            >
+              <option value="">All</option>
+              <option value="true">Activated</option>
+              <option value="false">Deactivated</option>
+            </Form.Control>
+          </Form.Group>
+        </div>
       </div>
       <div className="row">
         <div className="col-md-12">
@@ -194,8 +233,8 @@ function JiraTickets() {
                 </tr>
               </thead>
               <tbody>
-                {Array.isArray(currentTickets) &&
-                  currentTickets.map((ticket) => (
+                {Array.isArray(tickets) &&
+                  tickets.map((ticket) => (
                     <tr key={ticket._id}>
                       <td>{ticket.Title}</td>
                       <td>{ticket.Status}</td>
@@ -240,7 +279,7 @@ function JiraTickets() {
               disabled={currentPage === 1}
             />
             {Array.from(
-              { length: Math.ceil(filteredTickets.length / ticketsPerPage) },
+              { length: cursors.length },
               (_, index) => {
                 const page = index + 1;
                 if (page <= maxPageNumberLimit && page > minPageNumberLimit) {
@@ -259,10 +298,7 @@ function JiraTickets() {
             )}
             <Pagination.Next
               onClick={handleNextbtn}
-              disabled={
-                currentPage ===
-                Math.ceil(filteredTickets.length / ticketsPerPage)
-              }
+              disabled={currentPage === cursors.length}
             />
           </Pagination>
         </div>
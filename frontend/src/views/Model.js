@@ -2,6 +2,8 @@ import React, { useState, useEffect } from 'react';
 import 'bootstrap/dist/css/bootstrap.min.css';
 import { ProgressBar } from 'react-bootstrap';
 
+const API = 'http://localhost:5000/best_matches_bp';
+
 export default function Model() {
   const [issues, setIssues] = useState([]);
   const [loading, setLoading] = useState(true);
@@ -12,22 +14,39 @@ export default function Model() {
   const [bestMatch, setBestMatch] = useState('');
   const [treePaths, setTreePaths] = useState([]);
   const [currentPage, setCurrentPage] = useState(1);
+  // cursors[i] is the cursor of page i + 1 (null for the first page); pages load one at a time
+  const [cursors, setCursors] = useState([null]);
   const itemsPerPage = 5;
   const [progress, setProgress] = useState(0);
   const [ticketDetails, setTicketDetails] = useState(null);
 
+  // Loads one page of matches and returns it
+  const fetchPage = async (page) => {
+    const params = new URLSearchParams({ limit: itemsPerPage });
+    if (cursors[page - 1]) {
+      params.set('cursor', cursors[page - 1]);
+    }
+    const response = await fetch(`${API}/?${params}`);
+    if (!response.ok) {
+      throw new Error('Network response was not ok');
+    }
+    const data = await response.json();
+    setIssues(data.data || []);
+    // Remember where the next page starts
+    setCursors((previous) => {
+      const known = previous.slice(0, page);
+      return data.next_cursor ? [...known, data.next_cursor] : known;
+    });
+    return data.data || [];
+  };
+
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const response = await fetch('http://localhost:5000/best_matches_bp');
-        if (!response.ok) {
-          throw new Error('Network response was not ok');
-        }
-        const data = await response.json();
-        console.log('Data fetched:', data.data);
-        setIssues(data.data || []);
+        const data = await fetchPage(1);
+        console.log('Data fetched:', data);
 
-        if (!data.data || data.data.length === 0) {
+        if (data.length === 0) {
           runModel();
         }
         setLoading(false); // Ensure loading state is updated
@@ -57,14 +76,28 @@ export default function Model() {
 
   const runModel = async () => {
     setLoading(true);
+    setProgress(0);
     try {
-      const response = await fetch('http://localhost:5000/tree-classification/match_issues');
+      const response = await fetch('http://localhost:5000/tree-classification/jobs', { method: 'POST' });
       if (!response.ok) {
         throw new Error('Failed to run the model');
       }
-      const data = await response.json();
-      console.log('Model run successfully:', data);
-      // Update the issues or any other state based on the response
+      let job = await response.json();
+      while (!['succeeded', 'failed', 'cancelled'].includes(job.status)) {
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        const statusResponse = await fetch(`http://localhost:5000/tree-classification/jobs/${job.job_id}?offset=${job.result_count}`);
+        if (!statusResponse.ok) {
+          throw new Error('Failed to get the model status');
+        }
+        job = await statusResponse.json();
+        setProgress(job.progress.percentage);
+      }
+      console.log('Model run finished:', job);
+
+      // Results changed, so start over from the first page
+      setCursors([null]);
+      setCurrentPage(1);
+      await fetchPage(1);
       setLoading(false);
     } catch (error) {
       console.error('Error running the model:', error);
@@ -86,7 +119,7 @@ export default function Model() {
       }
 
       const updatedIssue = { id: selectedIssue._id, best_match: bestMatch, similarity_score: 0.0 };
-      const response = await fetch('http://localhost:5000/best_matches_bp/update_no_match_issue', {
+      const response = await fetch(`${API}/update_no_match_issue`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -112,8 +145,19 @@ export default function Model() {
     }
   };
 
-  const handleViewDetails = (issue) => {
-    setTicketDetails(issue);
+  // The listing only carries a few issue fields; the details show the whole match
+  const handleViewDetails = async (issue) => {
+    try {
+      const response = await fetch(`${API}/${issue._id}`);
+      if (!response.ok) {
+        throw new Error('Network response was not ok');
+      }
+      const data = await response.json();
+      setTicketDetails(data.data || issue);
+    } catch (error) {
+      console.error('Error fetching match details:', error);
+      setTicketDetails(issue);
+    }
     setShowDetailsModal(true);
   };
 
@@ -128,17 +172,17 @@ export default function Model() {
     return paths;
   };
 
-  const handlePageChange = (pageNumber) => {
+  const handlePageChange = async (pageNumber) => {
     setCurrentPage(pageNumber);
-  };
-
-  const getPaginatedData = () => {
-    const startIndex = (currentPage - 1) * itemsPerPage;
-    return issues.slice(startIndex, startIndex + itemsPerPage);
+    try {
+      await fetchPage(pageNumber);
+    } catch (error) {
+      console.error('Error fetching data:', error);
+    }
   };
 
   const getPageNumbers = () => {
-    const totalPages = Math.ceil(issues.length / itemsPerPage);
+    const totalPages = cursors.length;
     const pageNumbers = [];
     const maxPageNumbersToShow = 5;
     const startPage = Math.max(1, currentPage - Math.floor(maxPageNumbersToShow / 2));
@@ -156,7 +200,7 @@ export default function Model() {
       <button className="btn btn-primary mt-3" onClick={runModel}>Run the model again</button>
       {loading ? (
         <div className="text-center">
-          <ProgressBar animated now={100} />
+          <ProgressBar animated now={progress || 100} label={progress ? `${progress}%` : ''} />
           <p>Loading...</p>
         </div>
       ) : (
@@ -171,13 +215,13 @@ export default function Model() {
               </tr>
             </thead>
             <tbody>
-              {getPaginatedData().map((issue, index) => {
+              {issues.map((issue, index) => {
                 const bestMatch = issue.best_matches && issue.best_matches.length > 0 ? issue.best_matches[0].path : 'No match';
                 const similarityScore = issue.best_matches && issue.best_matches.length > 0 ? issue.best_matches[0].similarity_score : null;
 
                 return (
                   <tr key={index}>
-                    <td className="text-truncate" style={{ maxWidth: '300px' }}>{issue.issue.ID}</td>
+                    <td className="text-truncate" style={{ maxWidth: '300px' }}>{issue.issue?.ID}</td>
                     <td>{bestMatch}</td>
                     <td>{similarityScore !== null && similarityScore > 0 ? similarityScore.toFixed(2) : '--'}</td>
                     <td className="d-flex">
@@ -2,7 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { Button, Modal, Form } from 'react-bootstrap';
 import { FaPlus, FaEdit, FaTrash, FaEye, FaEyeSlash } from 'react-icons/fa';
 import { useSelector, useDispatch } from 'react-redux';
-import { getTreeAsync, saveTree } from '../redux/tree/actions';  // Adjust the import path as needed
+import { getTreeAsync, saveTree, addNodeAsync, updateNodeAsync, deleteNodeAsync } from '../redux/tree/actions';  // Adjust the import path as needed
 import '../style/Tree.css';
 import '../style/main.css';
 
@@ -34,23 +34,12 @@ const HierarchyView = () => {
   const handleAddChild = (node) => {
     if (node.children.length < MAX_CHILDREN) {
       const newChild = { id: Date.now(), name: 'Keyword', children: [] };
-      const newTree = addChildToTree(tree, node.id, newChild);
-      console.log('Adding child:', newTree);
-      dispatch(saveTree(newTree));
+      console.log('Adding child:', newChild);
+      dispatch(addNodeAsync({ parent_id: node.id, id: newChild.id, name: newChild.name }));
       setVisibleNodes(new Set(visibleNodes).add(node.id));
     }
   };
 
-  const addChildToTree = (tree, parentId, newChild) => {
-    if (tree.id === parentId) {
-      return { ...tree, children: [...tree.children, newChild] };
-    }
-    return {
-      ...tree,
-      children: tree.children.map(child => addChildToTree(child, parentId, newChild))
-    };
-  };
-
   const handleEditName = (node) => {
     setCurrentNode(node);
     setNewName(node.name);
@@ -58,38 +47,14 @@ const HierarchyView = () => {
   };
 
   const handleUpdateName = () => {
-    const newTree = updateNodeName(tree, currentNode.id, newName);
-    console.log('Updating node name:', newTree);
-    dispatch(saveTree(newTree));
+    console.log('Updating node name:', currentNode.id, newName);
+    dispatch(updateNodeAsync(currentNode.id, { name: newName }));
     setShowModal(false);
   };
 
-  const updateNodeName = (tree, nodeId, newName) => {
-    if (tree.id === nodeId) {
-      return { ...tree, name: newName };
-    }
-    return {
-      ...tree,
-      children: tree.children.map(child => updateNodeName(child, nodeId, newName))
-    };
-  };
-
   const handleDeleteNode = (nodeId) => {
-    const newTree = deleteNodeFromTree(tree, nodeId);
-    console.log('Deleting node:', newTree);
-    dispatch(saveTree(newTree));
-  };
-
-  const deleteNodeFromTree = (tree, nodeId) => {
-    if (tree.id === nodeId) {
-      return null;
-    }
-    return {
-      ...tree,
-      children: tree.children
-        .map(child => deleteNodeFromTree(child, nodeId))
-        .filter(Boolean)
-    };
+    console.log('Deleting node:', nodeId);
+    dispatch(deleteNodeAsync(nodeId));
   };
 
   const renderTree = (node, parent = null, level = 0) => {
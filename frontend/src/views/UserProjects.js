@@ -5,7 +5,7 @@ import {
   assignProjectAsync,
   getProjectsForAccountAsync,
 } from "../redux/account/actions"; // Adjust the path as necessary
-import { getTicketsAsync } from "../redux/issues/actions"; // Adjust the path as necessary
+import { getTicketFiltersAsync } from "../redux/issues/actions"; // Adjust the path as necessary
 import { Form, Button, Alert, Container, Row, Col, Table, OverlayTrigger, Tooltip } from "react-bootstrap";
 import '../style/UserProjects.css'; // Import custom CSS for additional styling
 
@@ -14,7 +14,7 @@ const UserProject = () => {
   const accounts = useSelector((state) => state.account.accounts);
   const projects = useSelector((state) => state.account.projects);
   const notif = useSelector((state) => state.account.notif);
-  const tickets = useSelector((state) => state.jira.tickets);
+  const ticketProjects = useSelector((state) => state.jira.filterOptions.Project);
 
   const [selectedAccountId, setSelectedAccountId] = useState('');
   const [projectName, setProjectName] = useState('');
@@ -22,7 +22,7 @@ const UserProject = () => {
 
   useEffect(() => {
     dispatch(getAccountsAsync());
-    dispatch(getTicketsAsync());
+    dispatch(getTicketFiltersAsync());
   }, [dispatch]);
 
   useEffect(() => {
@@ -64,13 +64,11 @@ const UserProject = () => {
                 onChange={(e) => setProjectName(e.target.value)}
               >
                 <option value="">Select Project</option>
-                {Array.from(new Set(tickets.map((ticket) => ticket.Project))).map(
-                  (project) => (
-                    <option key={project} value={project}>
-                      {project}
-                    </option>
-                  )
-                )}
+                {ticketProjects.map((project) => (
+                  <option key={project} value={project}>
+                    {project}
+                  </option>
+                ))}
               </Form.Control>
             </Form.Group>
           </Form>